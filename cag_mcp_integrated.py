@@ -647,6 +647,15 @@ class CAGEngineMCP:
         
         return response
     
+    async def process_queries(self, queries: List[str], session_id: str,
+                              user_context: Dict = None) -> List[Dict]:
+        """Process several queries for one session concurrently, warming the cache once"""
+        # Warm before fanning out so concurrent queries don't each see a cold session
+        await self.ensure_cache_warmed(session_id, user_context)
+        return await asyncio.gather(
+            *(self.process_query(query, session_id, user_context) for query in queries)
+        )
+    
     def _update_performance_metrics(self, performance: Dict):
         """Update performance metrics"""
         self.performance_metrics['total_queries'] += 1
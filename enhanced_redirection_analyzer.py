@@ -8,11 +8,22 @@ Addresses inadequate methodology that only counted frequency
 
 import asyncio
 import json
+import os
 import re
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
-import psycopg
-from psycopg.rows import dict_row
+import asyncpg
+
+# Bounds on the connection pool shared by concurrent session loads
+DB_POOL_MIN_SIZE = 2
+DB_POOL_MAX_SIZE = 8
+
+async def _init_connection(conn):
+    """Per-connection setup: decode json/jsonb columns into Python objects"""
+    for json_type in ('json', 'jsonb'):
+        await conn.set_type_codec(
+            json_type, encoder=json.dumps, decoder=json.loads, schema='pg_catalog'
+        )
 
 class SemanticRedirectionAnalyzer:
     """Semantic analysis of redirection content and intent"""
@@ -391,17 +402,30 @@ class ComprehensiveRedirectionAnalyzer:
         self.db_config = db_config
         self.semantic_analyzer = SemanticRedirectionAnalyzer()
         self.effectiveness_tracker = ResolutionEffectivenessTracker()
-        
-    async def connect_db(self):
-        """Connect to database"""
-        return await psycopg.AsyncConnection.connect(
-            host=self.db_config['host'],
-            port=self.db_config['port'],
-            dbname=self.db_config['dbname'],
-            user=self.db_config['user'],
-            password=self.db_config['password'],
-            row_factory=dict_row
-        )
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+        
+    async def _get_pool(self):
+        """Lazily open the connection pool shared by concurrent analyses"""
+        async with self._pool_lock:
+            if self._pool is None:
+                self._pool = await asyncpg.create_pool(
+                    host=self.db_config['host'],
+                    port=self.db_config['port'],
+                    database=self.db_config['dbname'],
+                    user=self.db_config['user'],
+                    password=self.db_config['password'],
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    init=_init_connection
+                )
+        return self._pool
+    
+    async def close(self):
+        """Close the connection pool"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
     
     async def analyze_session_redirections(self, session_id: str) -> Dict:
         """Comprehensive analysis of session redirections"""
@@ -460,16 +484,15 @@ class ComprehensiveRedirectionAnalyzer:
     
     async def _load_session_data(self, session_id: str) -> Optional[Dict]:
         """Load complete session data"""
+        query = '''
+            SELECT full_conversation_data 
+            FROM session_complete_data 
+            WHERE session_id = $1
+        '''
         try:
-            conn = await self.connect_db()
-            async with conn.cursor() as cur:
-                await cur.execute('''
-                    SELECT full_conversation_data 
-                    FROM session_complete_data 
-                    WHERE session_id = %s
-                ''', (session_id,))
-                result = await cur.fetchone()
-            await conn.close()
+            pool = await self._get_pool()
+            async with pool.acquire() as conn:
+                result = await conn.fetchrow(query, session_id)
             
             return result['full_conversation_data'] if result else None
             
@@ -620,7 +643,10 @@ async def test_enhanced_redirection_analysis():
     test_session = "0daffdc5-b8f5-4243-bc7a-c6e0fdf4995a"
     
     print(f"Analyzing session: {test_session}")
-    analysis = await analyzer.analyze_session_redirections(test_session)
+    try:
+        analysis = await analyzer.analyze_session_redirections(test_session)
+    finally:
+        await analyzer.close()
     
     print(f"\n=== ANALYSIS RESULTS ===")
     print(f"Session ID: {analysis['session_id']}")
@@ -336,9 +336,14 @@ CREATE TABLE IF NOT EXISTS mcp_tools (
 -- Performance Indexes
 CREATE INDEX IF NOT EXISTS idx_knowledge_items_project_id ON knowledge_items(project_id);
 CREATE INDEX IF NOT EXISTS idx_knowledge_items_semantic_type ON knowledge_items(semantic_type);
-CREATE INDEX IF NOT EXISTS idx_knowledge_items_embedding ON knowledge_items USING ivfflat (embedding vector_cosine_ops);
+-- HNSW replaces the earlier ivfflat index: no training step, better recall at the same probe cost
+DROP INDEX IF EXISTS idx_knowledge_items_embedding;
+CREATE INDEX IF NOT EXISTS idx_ki_embedding_hnsw ON knowledge_items USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
 CREATE INDEX IF NOT EXISTS idx_knowledge_items_full_text ON knowledge_items USING gin(full_text_search);
 CREATE INDEX IF NOT EXISTS idx_knowledge_items_active ON knowledge_items(is_active) WHERE is_active = true;
+CREATE INDEX IF NOT EXISTS ki_importance_created ON knowledge_items(importance_score DESC, created_at DESC);
+CREATE INDEX IF NOT EXISTS ki_title_trgm ON knowledge_items USING gin(title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ki_content_trgm ON knowledge_items USING gin(content gin_trgm_ops);
 
 CREATE INDEX IF NOT EXISTS idx_patterns_project_id ON patterns(project_id);
 CREATE INDEX IF NOT EXISTS idx_patterns_semantic_type ON patterns(semantic_type);
@@ -355,6 +360,7 @@ CREATE INDEX IF NOT EXISTS idx_pattern_relationships_active ON pattern_relations
 CREATE INDEX IF NOT EXISTS idx_strategic_insights_project ON strategic_insights(source_project_id);
 CREATE INDEX IF NOT EXISTS idx_strategic_insights_types ON strategic_insights USING gin(applicable_project_types);
 CREATE INDEX IF NOT EXISTS idx_strategic_insights_embedding ON strategic_insights USING ivfflat (embedding vector_cosine_ops);
+CREATE INDEX IF NOT EXISTS idx_strategic_insights_full_text ON strategic_insights USING gin(full_text_search);
 
 CREATE INDEX IF NOT EXISTS idx_ai_sessions_project_id ON ai_sessions(project_id);
 CREATE INDEX IF NOT EXISTS idx_ai_sessions_start_time ON ai_sessions(start_time);
@@ -402,6 +408,19 @@ $$ LANGUAGE 'plpgsql';
 CREATE TRIGGER update_knowledge_items_search BEFORE INSERT OR UPDATE ON knowledge_items 
     FOR EACH ROW EXECUTE FUNCTION update_full_text_search();
 
+-- Change notification for LISTEN-backed count caches (one notify per statement, not per row)
+CREATE OR REPLACE FUNCTION ki_notify()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('knowledge_items_changed', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE 'plpgsql';
+
+DROP TRIGGER IF EXISTS ki_notify_trg ON knowledge_items;
+CREATE TRIGGER ki_notify_trg AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON knowledge_items
+    FOR EACH STATEMENT EXECUTE FUNCTION ki_notify();
+
 CREATE OR REPLACE FUNCTION update_pattern_full_text_search()
 RETURNS TRIGGER AS $$
 BEGIN
@@ -5,12 +5,25 @@ Scriptable SSH operations with key-based authentication
 No password exposure in logs or commands
 """
 
+import asyncio
+import os
 import paramiko
 import subprocess
 import sys
 import time
+from collections import deque
 from pathlib import Path
 
+try:
+    import psycopg
+    PSYCOPG_AVAILABLE = True
+except ImportError:
+    PSYCOPG_AVAILABLE = False
+
+# OpenSSH connection multiplexing for subprocess ssh/rsync calls: the first
+# call opens a master socket, later calls attach without a new handshake
+SSH_MULTIPLEX_OPTS = "-o ControlMaster=auto -o ControlPath=~/.ssh/cm-%r@%h:%p -o ControlPersist=300"
+
 class SecureSSHClient:
     """Secure SSH client with key-based authentication"""
     
@@ -38,8 +51,13 @@ class SecureSSHClient:
             print(f"SSH connection failed: {e}")
             return False
     
-    def execute(self, command, timeout=30):
-        """Execute command on remote server"""
+    def execute(self, command, on_line=None, timeout=30, max_lines=None):
+        """Execute command on remote server, streaming output line by line
+        
+        Each stdout line is passed to on_line (if given). The full output is
+        returned unless max_lines is set, in which case only the last
+        max_lines lines of stdout and of stderr are kept.
+        """
         if not self.client:
             if not self.connect():
                 return None, "Connection failed"
@@ -47,20 +65,23 @@ class SecureSSHClient:
         try:
             stdin, stdout, stderr = self.client.exec_command(command, timeout=timeout)
             
-            # Wait for command to complete
-            exit_status = stdout.channel.recv_exit_status()
+            tail = deque(maxlen=max_lines)
+            for line in iter(stdout.readline, ''):
+                if on_line:
+                    on_line(line)
+                tail.append(line)
             
-            output = stdout.read().decode('utf-8')
-            error = stderr.read().decode('utf-8')
+            output = ''.join(tail)
+            error = ''.join(deque(iter(stderr.readline, ''), maxlen=max_lines))
             
             return output, error if error else None
             
         except Exception as e:
             return None, f"Command execution failed: {e}"
     
-    def execute_sudo(self, command, timeout=30):
+    def execute_sudo(self, command, on_line=None, timeout=30):
         """Execute sudo command (assumes passwordless sudo is configured)"""
-        return self.execute(f"sudo {command}", timeout)
+        return self.execute(f"sudo {command}", on_line=on_line, timeout=timeout)
     
     def copy_file(self, local_path, remote_path):
         """Copy file to remote server using SFTP"""
@@ -104,8 +125,45 @@ class KnowledgePersistenceTools:
         
         return "healthy" in output, output
     
+    async def check_status(self):
+        """Check database and API status concurrently over one SSH transport"""
+        # Connect up front so both worker threads share the same transport
+        if not self.ssh.client:
+            self.ssh.connect()
+        
+        return await asyncio.gather(
+            asyncio.to_thread(self.check_database_status),
+            asyncio.to_thread(self.check_api_status)
+        )
+    
     def get_knowledge_count(self):
         """Get count of knowledge items"""
+        if PSYCOPG_AVAILABLE:
+            count, error = self.get_knowledge_count_direct()
+            if error is None:
+                return count, None
+        
+        # Fall back to running the query on the server over SSH
+        return self.get_knowledge_count_ssh()
+    
+    def get_knowledge_count_direct(self):
+        """Get count of knowledge items with a direct PostgreSQL query"""
+        try:
+            with psycopg.connect(
+                host=os.getenv('DB_HOST', self.ssh.hostname),
+                port=int(os.getenv('DB_PORT', '5432')),
+                dbname=os.getenv('DB_NAME', 'knowledge_persistence'),
+                user=os.getenv('DB_USER', 'postgres'),
+                password=os.getenv('DB_PASSWORD', ''),
+                connect_timeout=10
+            ) as conn:
+                row = conn.execute("SELECT COUNT(*) FROM knowledge_items").fetchone()
+            return row[0], None
+        except Exception as e:
+            return None, f"Direct query failed: {e}"
+    
+    def get_knowledge_count_ssh(self):
+        """Get count of knowledge items by running psycopg on the server"""
         cmd = "cd KnowledgePersistence-AI && source venv/bin/activate && python3 -c \"import os; import psycopg; conn = psycopg.connect(host='localhost', dbname='knowledge_persistence', user='postgres', password=os.getenv('DB_PASSWORD', '')); cur = conn.cursor(); cur.execute('SELECT COUNT(*) FROM knowledge_items'); print(cur.fetchone()[0]); conn.close()\""
         
         output, error = self.ssh.execute(cmd)
@@ -125,7 +183,7 @@ class KnowledgePersistenceTools:
         synced_files = []
         for pattern in file_patterns:
             # Use local rsync over SSH for efficiency
-            cmd = f"rsync -avz -e 'ssh -i ~/.ssh/id_ed25519_pgdbsrv' {pattern} greg@192.168.10.90:/home/greg/KnowledgePersistence-AI/"
+            cmd = f"rsync -avz -e 'ssh -i ~/.ssh/id_ed25519_pgdbsrv {SSH_MULTIPLEX_OPTS}' {pattern} greg@192.168.10.90:/home/greg/KnowledgePersistence-AI/"
             result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
             
             if result.returncode == 0:
@@ -183,8 +241,7 @@ def main():
     
     try:
         if command == "status":
-            db_status, db_output = tools.check_database_status()
-            api_status, api_output = tools.check_api_status()
+            (db_status, db_output), (api_status, api_output) = asyncio.run(tools.check_status())
             
             print(f"Database: {'✅ Active' if db_status else '❌ Inactive'}")
             print(f"API: {'✅ Healthy' if api_status else '❌ Unhealthy'}")
@@ -208,9 +265,9 @@ def main():
                 print(output)
                 
         elif command == "shell":
-            # Simple interactive shell
-            ssh = SecureSSHClient()
-            if ssh.connect():
+            # Simple interactive shell, reusing the tools' SSH transport
+            ssh = tools.ssh
+            if ssh.client or ssh.connect():
                 print("Connected to pgdbsrv. Type 'exit' to quit.")
                 while True:
                     cmd = input("pgdbsrv$ ")
@@ -221,7 +278,6 @@ def main():
                         print(output)
                     if error:
                         print(f"Error: {error}")
-                ssh.close()
             else:
                 print("❌ Connection failed")
                 
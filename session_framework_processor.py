@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 """
-import os
 Session Framework Processor
 Implements complete session data storage and dynamic categorization
 Date: 2025-07-04
@@ -8,14 +7,28 @@ Date: 2025-07-04
 
 import asyncio
 import json
+import os
 import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import psycopg
 from psycopg.rows import dict_row
+from psycopg.types.json import Jsonb
 import openai
 import numpy as np
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def dumps_json(obj: Any):
+    """Serialize large JSONB payloads, preferring orjson (returns bytes)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj)
+
 class SessionFrameworkProcessor:
     def __init__(self, db_config: Dict[str, str]):
         self.db_config = db_config
@@ -46,12 +59,14 @@ class SessionFrameworkProcessor:
     async def digest_prompt(self, user_prompt: str, session_context: Dict) -> Dict:
         """Mandatory prompt digestion before action"""
         
+        prompt_lower = user_prompt.lower()
+        
         # Extract intent and context
         intent_analysis = {
-            'user_intent': self.extract_intent(user_prompt),
+            'user_intent': self.extract_intent(user_prompt, prompt_lower),
             'session_context': session_context,
             'knowledge_requirements': await self.identify_knowledge_needs(user_prompt),
-            'categorization_implications': await self.assess_categorization(user_prompt),
+            'categorization_implications': await self.assess_categorization(user_prompt, prompt_lower),
             'previous_session_relevance': await self.check_previous_session_relevance(user_prompt)
         }
         
@@ -67,16 +82,19 @@ class SessionFrameworkProcessor:
             'requires_confirmation': self.verification_required
         }
     
-    def extract_intent(self, prompt: str) -> str:
+    def extract_intent(self, prompt: str, prompt_lower: Optional[str] = None) -> str:
         """Extract user intent from prompt"""
+        if prompt_lower is None:
+            prompt_lower = prompt.lower()
+        
         # Simple intent analysis - can be enhanced with NLP
-        if 'continue' in prompt.lower() or 'previous' in prompt.lower():
+        if 'continue' in prompt_lower or 'previous' in prompt_lower:
             return 'continuation'
-        elif 'new' in prompt.lower() or 'start' in prompt.lower():
+        elif 'new' in prompt_lower or 'start' in prompt_lower:
             return 'new_topic'
-        elif 'implement' in prompt.lower() or 'deploy' in prompt.lower():
+        elif 'implement' in prompt_lower or 'deploy' in prompt_lower:
             return 'implementation'
-        elif 'analyze' in prompt.lower() or 'understand' in prompt.lower():
+        elif 'analyze' in prompt_lower or 'understand' in prompt_lower:
             return 'analysis'
         else:
             return 'general'
@@ -90,14 +108,20 @@ class SessionFrameworkProcessor:
         # Query similar knowledge items
         conn = await self.connect_db()
         async with conn.cursor() as cur:
+            # ORDER BY the raw distance so the hnsw index drives the scan,
+            # then apply the similarity threshold to the top candidates
             await cur.execute("""
-                SELECT title, knowledge_type, content, 
-                       1 - (embedding <=> %s::vector) as similarity
-                FROM knowledge_items
-                WHERE 1 - (embedding <=> %s::vector) > 0.7
-                ORDER BY similarity DESC
-                LIMIT 10;
-            """, (prompt_embedding, prompt_embedding))
+                SELECT title, knowledge_type, content, 1 - distance as similarity
+                FROM (
+                    SELECT title, knowledge_type, content,
+                           embedding <=> %s::vector as distance
+                    FROM knowledge_items
+                    ORDER BY embedding <=> %s::vector
+                    LIMIT 10
+                ) nearest
+                WHERE distance < 0.3
+                ORDER BY distance;
+            """, (prompt_embedding, prompt_embedding), prepare=True)
             
             similar_items = await cur.fetchall()
         
@@ -105,19 +129,21 @@ class SessionFrameworkProcessor:
         
         return [item['title'] for item in similar_items]
     
-    async def assess_categorization(self, prompt: str) -> Dict:
+    async def assess_categorization(self, prompt: str, prompt_lower: Optional[str] = None) -> Dict:
         """Assess categorization implications of prompt"""
+        if prompt_lower is None:
+            prompt_lower = prompt.lower()
         
         categories = {
             'project_category': 'KnowledgePersistence-AI',  # Default
-            'action_type': self.extract_intent(prompt),
-            'technical_domain': self.extract_technical_domain(prompt),
-            'priority_level': self.assess_priority(prompt)
+            'action_type': self.extract_intent(prompt, prompt_lower),
+            'technical_domain': self.extract_technical_domain(prompt, prompt_lower),
+            'priority_level': self.assess_priority(prompt, prompt_lower)
         }
         
         return categories
     
-    def extract_technical_domain(self, prompt: str) -> str:
+    def extract_technical_domain(self, prompt: str, prompt_lower: Optional[str] = None) -> str:
         """Extract technical domain from prompt"""
         domains = {
             'database': ['database', 'sql', 'postgres', 'schema'],
@@ -127,19 +153,21 @@ class SessionFrameworkProcessor:
             'knowledge': ['knowledge', 'categorization', 'retrieval']
         }
         
-        prompt_lower = prompt.lower()
+        if prompt_lower is None:
+            prompt_lower = prompt.lower()
         for domain, keywords in domains.items():
             if any(keyword in prompt_lower for keyword in keywords):
                 return domain
         
         return 'general'
     
-    def assess_priority(self, prompt: str) -> str:
+    def assess_priority(self, prompt: str, prompt_lower: Optional[str] = None) -> str:
         """Assess priority level of prompt"""
         high_priority_keywords = ['critical', 'urgent', 'immediate', 'important']
         medium_priority_keywords = ['should', 'need', 'required']
         
-        prompt_lower = prompt.lower()
+        if prompt_lower is None:
+            prompt_lower = prompt.lower()
         
         if any(keyword in prompt_lower for keyword in high_priority_keywords):
             return 'high'
@@ -157,24 +185,31 @@ class SessionFrameworkProcessor:
         # Check for similar previous sessions
         conn = await self.connect_db()
         async with conn.cursor() as cur:
+            # Only the newest row and the window size are needed, so let the
+            # server reduce the window instead of shipping insights_discovered
             await cur.execute("""
-                SELECT session_id, project_name, session_type,
-                       insights_discovered, created_at
-                FROM session_complete_data
-                ORDER BY created_at DESC
-                LIMIT 5;
-            """)
+                WITH recent AS (
+                    SELECT session_id, project_name, created_at
+                    FROM session_complete_data
+                    ORDER BY created_at DESC
+                    LIMIT 5
+                )
+                SELECT
+                    (SELECT session_id FROM recent ORDER BY created_at DESC LIMIT 1) as most_recent_id,
+                    (SELECT project_name FROM recent ORDER BY created_at DESC LIMIT 1) as project_name,
+                    (SELECT COUNT(*) FROM recent) as session_count;
+            """, prepare=True)
             
-            recent_sessions = await cur.fetchall()
+            recent = await cur.fetchone()
         
         await conn.close()
         
         # Simple relevance check - can be enhanced
-        if recent_sessions:
+        if recent and recent['session_count']:
             return {
-                'most_recent_session': recent_sessions[0]['session_id'],
-                'project_continuity': recent_sessions[0]['project_name'],
-                'session_count': len(recent_sessions)
+                'most_recent_session': recent['most_recent_id'],
+                'project_continuity': recent['project_name'],
+                'session_count': recent['session_count']
             }
         
         return None
@@ -201,6 +236,11 @@ Is this understanding correct? Should I proceed with this analysis?
         if not self.current_session_id:
             self.current_session_id = str(uuid.uuid4())
         
+        digestion = Jsonb(
+            {'prompt': prompt, 'analysis': analysis, 'verification': verification},
+            dumps=dumps_json
+        )
+        
         # Store in session_complete_data
         conn = await self.connect_db()
         async with conn.cursor() as cur:
@@ -210,17 +250,16 @@ Is this understanding correct? Should I proceed with this analysis?
                  verification_summaries, created_at)
                 VALUES (%s, %s, %s, %s, %s, %s)
                 ON CONFLICT (session_id) DO UPDATE SET
-                    verification_summaries = session_complete_data.verification_summaries || %s,
+                    verification_summaries = session_complete_data.verification_summaries || EXCLUDED.verification_summaries,
                     updated_at = CURRENT_TIMESTAMP;
             """, (
                 self.current_session_id,
                 'KnowledgePersistence-AI',
                 analysis['categorization_implications']['project_category'],
                 analysis['user_intent'],
-                json.dumps({'prompt': prompt, 'analysis': analysis, 'verification': verification}),
-                datetime.now(),
-                json.dumps({'prompt': prompt, 'analysis': analysis, 'verification': verification})
-            ))
+                digestion,
+                datetime.now()
+            ), prepare=True)
         
         await conn.commit()
         await conn.close()
@@ -248,7 +287,7 @@ Is this understanding correct? Should I proceed with this analysis?
                 embedding,
                 self.current_session_id,
                 1
-            ))
+            ), prepare=True)
         
         await conn.commit()
         await conn.close()
@@ -279,32 +318,25 @@ Is this understanding correct? Should I proceed with this analysis?
                  vector_associations, category_classifications)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 ON CONFLICT (session_id) DO UPDATE SET
-                    full_conversation_data = %s,
-                    insights_discovered = %s,
-                    knowledge_items_created = %s,
-                    knowledge_items_referenced = %s,
-                    vector_associations = %s,
-                    category_classifications = %s,
+                    full_conversation_data = EXCLUDED.full_conversation_data,
+                    insights_discovered = EXCLUDED.insights_discovered,
+                    knowledge_items_created = EXCLUDED.knowledge_items_created,
+                    knowledge_items_referenced = EXCLUDED.knowledge_items_referenced,
+                    vector_associations = EXCLUDED.vector_associations,
+                    category_classifications = EXCLUDED.category_classifications,
                     updated_at = CURRENT_TIMESTAMP;
             """, (
                 self.current_session_id,
                 session_data.get('repo_context', 'KnowledgePersistence-AI'),
                 session_data.get('project_name', 'KnowledgePersistence-AI'),
                 session_data.get('session_type', 'implementation'),
-                json.dumps(session_data.get('conversation_data', {})),
-                json.dumps(session_data.get('insights', {})),
-                session_data.get('knowledge_items_created', []),
-                session_data.get('knowledge_items_referenced', []),
-                json.dumps(session_data.get('vector_associations', {})),
-                json.dumps(session_data.get('category_classifications', {})),
-                # Conflict resolution values
-                json.dumps(session_data.get('conversation_data', {})),
-                json.dumps(session_data.get('insights', {})),
+                Jsonb(session_data.get('conversation_data', {}), dumps=dumps_json),
+                Jsonb(session_data.get('insights', {}), dumps=dumps_json),
                 session_data.get('knowledge_items_created', []),
                 session_data.get('knowledge_items_referenced', []),
-                json.dumps(session_data.get('vector_associations', {})),
-                json.dumps(session_data.get('category_classifications', {}))
-            ))
+                Jsonb(session_data.get('vector_associations', {}), dumps=dumps_json),
+                Jsonb(session_data.get('category_classifications', {}), dumps=dumps_json)
+            ), prepare=True)
         
         await conn.commit()
         await conn.close()
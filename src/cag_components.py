@@ -5,22 +5,210 @@ Complete implementation of the missing components referenced in the original cod
 """
 
 import asyncio
+import functools
+import heapq
+import io
+import itertools
 import json
 import logging
+import os
 import time
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
 from enum import Enum
+from operator import attrgetter
 from dataclasses import dataclass, field
-import psycopg
-from psycopg.rows import dict_row
+from contextlib import asynccontextmanager
+import asyncpg
 import numpy as np
 import hashlib
 
+# Package-relative when imported as src.cag_components, bare when src/ is on sys.path
+try:
+    from .vector_ops import cos_sim_matrix, normalize_rows
+except ImportError:
+    from vector_ops import cos_sim_matrix, normalize_rows
+
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+try:
+    import lmdb
+    LMDB_AVAILABLE = True
+except ImportError:
+    LMDB_AVAILABLE = False
+
+try:
+    from datasketch import MinHash, MinHashLSH
+    DATASKETCH_AVAILABLE = True
+except ImportError:
+    DATASKETCH_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Embedding configuration (768 dimensions to match the VECTOR(768) columns)
+EMBEDDING_MODEL_NAME = "all-mpnet-base-v2"
+EMBEDDING_DIM = 768
+EMBEDDING_BATCH_SIZE = 64
+EMBEDDING_CACHE_SIZE = 4096
+# Cached item embeddings are stored at half precision; similarity is computed in float32
+EMBEDDING_STORE_DTYPE = np.float16
+# Persistent content-hash -> embedding store shared across sessions (requires lmdb)
+EMBEDDING_STORE_PATH = os.getenv('CAG_EMBEDDING_STORE', 'embeddings.lmdb')
+EMBEDDING_STORE_MAP_SIZE = 1 << 30
+# Near-duplicate reuse: texts whose 5-character shingles overlap this much share an embedding
+FUZZY_MATCH_THRESHOLD = 0.95
+MINHASH_NUM_PERM = 128
+SHINGLE_SIZE = 5
+
+# Tokenizer for context budgeting (word-count estimate when tiktoken is missing)
+_ENC = tiktoken.get_encoding('cl100k_base') if TIKTOKEN_AVAILABLE else None
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text"""
+    if not text:
+        return 0
+    if _ENC is not None:
+        return len(_ENC.encode_ordinary(text))
+    return int(len(text.split()) * 1.3)  # Approximate tokens
+
+# Semantic query cache configuration (query-to-query similarity)
+QUERY_CACHE_THRESHOLD = 0.85
+QUERY_CACHE_TTL = 300
+QUERY_CACHE_SIZE = 256
+# Sessions with a live query cache; the least recently queried session is dropped beyond this
+QUERY_CACHE_MAX_SESSIONS = 64
+
+# Warm-cache semantic retrieval (query-to-document similarity)
+CACHE_SEARCH_TOP_K = 20
+CACHE_SEARCH_THRESHOLD = 0.4
+
+# Hot-path context queries, prepared once per pooled connection by _init_connection
+_SQL = {
+    "project": """
+        WITH project AS (
+            SELECT id, name, display_name, description, settings
+            FROM projects
+            WHERE name = 'knowledge-persistence-ai'
+            OR name = 'KnowledgePersistence-AI'
+            LIMIT 1
+        )
+        SELECT p.display_name, p.description, p.settings,
+               ki.title, ki.knowledge_type
+        FROM project p
+        LEFT JOIN LATERAL (
+            SELECT title, knowledge_type
+            FROM knowledge_items
+            WHERE project_id = p.id
+            ORDER BY created_at DESC
+            LIMIT 3
+        ) ki ON true
+    """,
+    "session": """
+        WITH current_session AS (
+            SELECT id, session_identifier, start_time, total_interactions
+            FROM ai_sessions
+            WHERE id::text = $1 OR session_identifier = $1
+            ORDER BY start_time DESC
+            LIMIT 1
+        )
+        SELECT s.session_identifier, s.start_time, s.total_interactions,
+               ki.title
+        FROM current_session s
+        LEFT JOIN LATERAL (
+            SELECT title
+            FROM knowledge_items
+            WHERE session_id = s.id
+            ORDER BY created_at DESC
+            LIMIT 5
+        ) ki ON true
+    """,
+    "domain": """
+        SELECT title, content, knowledge_type, importance_score,
+               ts_rank(full_text_search, plainto_tsquery('english', $1)) as rank
+        FROM knowledge_items
+        WHERE full_text_search @@ plainto_tsquery('english', $1)
+        AND is_active = true
+        ORDER BY rank DESC, importance_score DESC
+        LIMIT 10
+    """,
+    "experience": """
+        SELECT title, content, created_at, importance_score
+        FROM knowledge_items
+        WHERE full_text_search @@ plainto_tsquery('english', $1)
+        AND knowledge_type = 'experiential'
+        AND is_active = true
+        ORDER BY ts_rank(full_text_search, plainto_tsquery('english', $1)) DESC,
+                 importance_score DESC, created_at DESC
+        LIMIT 5
+    """,
+    "strategic": """
+        SELECT title, description, insight_type, confidence_score
+        FROM strategic_insights
+        WHERE full_text_search @@ plainto_tsquery('english', $1)
+        AND is_active = true
+        ORDER BY ts_rank(full_text_search, plainto_tsquery('english', $1)) DESC,
+                 confidence_score DESC, created_at DESC
+        LIMIT 5
+    """,
+    "dynamic": """
+        SELECT title, content, knowledge_type, created_at
+        FROM knowledge_items
+        WHERE full_text_search @@ plainto_tsquery('english', $1)
+        AND is_active = true
+        AND knowledge_type IN ('procedural', 'technical', 'patterns')
+        ORDER BY ts_rank(full_text_search, plainto_tsquery('english', $1)) DESC,
+                 created_at DESC
+        LIMIT 3
+    """
+}
+
+# Pool sizing: a few warm backends, growing on demand under concurrent queries
+DB_POOL_MIN_SIZE = 2
+DB_POOL_MAX_SIZE = 50
+
+# Every layer determine_cache_layer can route an item to
+CACHE_LAYERS = ('strategic', 'domain', 'experience', 'session', 'dynamic', 'response')
+
+# Warm cache bounds and eviction tiers: when over a bound, least recently used
+# low-priority items go first, then mid; high-priority items are never evicted
+CACHE_MAX_ITEMS = 10000
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+CACHE_TIER_HIGH = 0.8
+CACHE_TIER_MID = 0.4
+# Initial slot count of the parallel priority array (doubles as needed)
+CACHE_STATS_INITIAL_CAPACITY = 1024
+
+# Knowledge type weighting used in cache priority scoring
+CACHE_TYPE_WEIGHTS = {
+    'procedural': 0.9,
+    'technical': 0.8,
+    'experiential': 0.7,
+    'strategic': 0.85,
+    'contextual': 0.6,
+    'patterns': 0.8,
+    'factual': 0.5,
+    'relational': 0.4
+}
+
 class KnowledgeType(Enum):
     """Knowledge type enumeration"""
     FACTUAL = "factual"
@@ -32,6 +220,9 @@ class KnowledgeType(Enum):
     PATTERN_RECOGNITION = "patterns"
     STRATEGIC_INSIGHT = "strategic"
 
+# Value -> member lookup, avoiding Enum.__call__ on the cache hot path
+_KT_BY_VALUE = {member.value: member for member in KnowledgeType}
+
 class ContextLayer(Enum):
     """Context layer enumeration with priorities"""
     SYSTEM = "system"
@@ -43,6 +234,25 @@ class ContextLayer(Enum):
     DYNAMIC = "dynamic"
     RESPONSE = "response"
 
+# Layer compilation order and precomputed section headers
+_LAYER_ORDER: Tuple[ContextLayer, ...] = tuple(ContextLayer)
+_LAYER_HEADERS = {layer: f"=== {layer.value.upper()} CONTEXT ===\n" for layer in ContextLayer}
+
+# Fallback text for a layer whose loader raised
+_UNAVAILABLE_CONTEXT = {layer: f"{layer.value.capitalize()} context unavailable" for layer in ContextLayer}
+
+_SYSTEM_CONTEXT = """
+CAG System - Cache-Augmented Generation
+- Pattern Intelligence Architecture
+- Semantic Knowledge Classification
+- Context-Aware Knowledge Retrieval
+- Multi-layer Context Management
+- Error Recovery and Graceful Degradation
+
+Current Session: Knowledge Persistence AI System
+Capabilities: Pattern extraction, semantic search, strategic insights
+""".strip()
+
 @dataclass
 class KnowledgeItem:
     """Knowledge item data structure"""
@@ -58,7 +268,7 @@ class KnowledgeItem:
     usage_count: int = 0
     success_rate: float = 0.0
 
-@dataclass
+@dataclass(slots=True)
 class CacheItem:
     """Cache item with metadata"""
     knowledge_item: KnowledgeItem
@@ -67,16 +277,358 @@ class CacheItem:
     loaded_at: datetime = field(default_factory=datetime.now)
     access_count: int = 0
     last_accessed: Optional[datetime] = None
+    session_id: Optional[str] = None
+    content_len: int = field(init=False)
+    
+    def __post_init__(self):
+        self.content_len = len(self.knowledge_item.content)
+
+_cache_priority = attrgetter('cache_priority')
+
+# Flat projection of a CacheItem: output key -> attribute path
+_PROJECT_FIELDS = {
+    'id': 'knowledge_item.id',
+    'title': 'knowledge_item.title',
+    'content': 'knowledge_item.content',
+    'knowledge_type': 'knowledge_item.knowledge_type.value',
+    'cache_priority': 'cache_priority',
+    'cache_layer': 'cache_layer',
+    'access_count': 'access_count',
+}
+_PROJECT_KEYS = tuple(_PROJECT_FIELDS)
+
+@functools.lru_cache(maxsize=32)
+def _projector(fields: Tuple[str, ...]) -> Callable[[CacheItem], Dict[str, Any]]:
+    """Build a projection that reads only the requested fields in one C-level call per item"""
+    unknown = [name for name in fields if name not in _PROJECT_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f"Invalid projection fields: {unknown or fields}")
+    
+    getter = attrgetter(*(_PROJECT_FIELDS[name] for name in fields))
+    if len(fields) == 1:
+        name = fields[0]
+        return lambda item: {name: getter(item)}
+    return lambda item: dict(zip(fields, getter(item)))
+
+class BatchEmbedder:
+    """Batched text embedder with a content-hash keyed LRU cache
+
+    In-memory misses are looked up in a persistent LMDB store before running
+    the model, so content embedded in an earlier session is never re-embedded.
+    Remaining misses that are near-duplicates of a cached text (MinHash LSH)
+    reuse its embedding instead of running the model.
+    """
+    
+    # Emit unit-length float32 vectors so every similarity downstream is a plain dot product
+    normalize = True
+    
+    def __init__(self, model_name: str = EMBEDDING_MODEL_NAME, cache_size: int = EMBEDDING_CACHE_SIZE,
+                 store_path: Optional[str] = EMBEDDING_STORE_PATH):
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self.cache: OrderedDict = OrderedDict()
+        self.model = None
+        self._store = None
+        self._store_db = None
+        self._lsh = None
+        self._sketches: Dict[bytes, Any] = {}
+        
+        if DATASKETCH_AVAILABLE:
+            self._lsh = MinHashLSH(threshold=FUZZY_MATCH_THRESHOLD, num_perm=MINHASH_NUM_PERM)
+        
+        if SENTENCE_TRANSFORMERS_AVAILABLE:
+            self.model = SentenceTransformer(model_name)
+        else:
+            logger.warning("sentence-transformers not available, using mock embeddings")
+        
+        # Only real model output is worth persisting; one named sub-database per model
+        if self.model is not None and store_path and LMDB_AVAILABLE:
+            try:
+                self._store = lmdb.open(store_path, map_size=EMBEDDING_STORE_MAP_SIZE, max_dbs=8)
+                self._store_db = self._store.open_db(model_name.encode('utf-8'))
+            except lmdb.Error as e:
+                logger.warning(f"Embedding store unavailable: {e}")
+                self._store = None
+    
+    @property
+    def is_semantic(self) -> bool:
+        """True when embeddings come from a real model (mock vectors carry no meaning)"""
+        return self.model is not None
+    
+    @staticmethod
+    def content_hash(text: str) -> bytes:
+        """SHA-256 digest used as the cache key for a text"""
+        return hashlib.sha256(text.encode('utf-8')).digest()
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run one model forward pass over a batch of texts"""
+        if self.model is None:
+            # Mock embedding generation - in production, use actual model
+            embeddings = np.random.random((len(texts), EMBEDDING_DIM)).astype(np.float32)
+        else:
+            embeddings = np.asarray(self.model.encode(
+                texts,
+                batch_size=EMBEDDING_BATCH_SIZE,
+                convert_to_numpy=True
+            ), dtype=np.float32)
+        
+        if self.normalize:
+            embeddings = normalize_rows(embeddings)
+        return embeddings
+    
+    @staticmethod
+    def _minhash(text: str) -> 'MinHash':
+        """MinHash sketch over whitespace-normalized character shingles"""
+        normalized = " ".join(text.split())
+        shingles = {
+            normalized[i:i + SHINGLE_SIZE]
+            for i in range(max(1, len(normalized) - SHINGLE_SIZE + 1))
+        }
+        sketch = MinHash(num_perm=MINHASH_NUM_PERM)
+        sketch.update_batch([shingle.encode('utf-8') for shingle in shingles])
+        return sketch
+    
+    def _fuzzy_match(self, sketch: 'MinHash') -> Optional[np.ndarray]:
+        """Embedding of a cached near-duplicate text, if one exists"""
+        for digest in self._lsh.query(sketch):
+            if digest in self.cache and sketch.jaccard(self._sketches[digest]) >= FUZZY_MATCH_THRESHOLD:
+                return self.cache[digest]
+        return None
+    
+    def _store_get(self, digests: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Fetch persisted embeddings for the given content hashes"""
+        found = {}
+        with self._store.begin(db=self._store_db) as txn:
+            for digest in digests:
+                raw = txn.get(digest)
+                if raw is not None:
+                    found[digest] = np.frombuffer(raw, dtype=EMBEDDING_STORE_DTYPE).astype(np.float32)
+        return found
+    
+    def _store_put(self, entries):
+        """Persist (content hash, embedding) pairs at half precision"""
+        try:
+            with self._store.begin(db=self._store_db, write=True) as txn:
+                for digest, embedding in entries:
+                    txn.put(digest, embedding.astype(EMBEDDING_STORE_DTYPE).tobytes())
+        except lmdb.Error as e:
+            logger.warning(f"Persisting embeddings failed: {e}")
+    
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts, only running the model on texts not already cached"""
+        hashes = [self.content_hash(text) for text in texts]
+        
+        misses = {}
+        for text, digest in zip(texts, hashes):
+            if digest in self.cache:
+                self.cache.move_to_end(digest)
+            elif digest not in misses:
+                misses[digest] = text
+        
+        if misses and self._store is not None:
+            for digest, embedding in self._store_get(list(misses)).items():
+                self.cache[digest] = embedding
+                del misses[digest]
+        
+        sketches = {}
+        if misses and self._lsh is not None:
+            for digest in list(misses):
+                sketch = self._minhash(misses[digest])
+                embedding = self._fuzzy_match(sketch)
+                if embedding is not None:
+                    self.cache[digest] = embedding
+                    del misses[digest]
+                else:
+                    sketches[digest] = sketch
+        
+        if misses:
+            embeddings = self._encode(list(misses.values()))
+            for digest, embedding in zip(misses, embeddings):
+                self.cache[digest] = embedding
+            if self._store is not None:
+                self._store_put(zip(misses, embeddings))
+            for digest, sketch in sketches.items():
+                self._lsh.insert(digest, sketch)
+                self._sketches[digest] = sketch
+        
+        # Collect results before trimming so a batch larger than the cache still resolves
+        results = [self.cache[digest] for digest in hashes]
+        while len(self.cache) > self.cache_size:
+            digest, _ = self.cache.popitem(last=False)
+            if self._sketches.pop(digest, None) is not None:
+                self._lsh.remove(digest)
+        
+        return results
+
+class SemanticQueryCache:
+    """Semantic cache of compiled contexts keyed by normalized query embedding
+
+    Embeddings must come from BatchEmbedder, which already L2-normalizes them.
+    """
+    
+    def __init__(self, threshold: float = QUERY_CACHE_THRESHOLD, ttl: float = QUERY_CACHE_TTL,
+                 max_entries: int = QUERY_CACHE_SIZE):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embeddings: List[np.ndarray] = []
+        self.contexts: List[str] = []
+        self.timestamps: List[float] = []
+        self.hits = 0
+        self.misses = 0
+        self._index = None
+    
+    def _evict(self, positions: List[int]):
+        for pos in sorted(positions, reverse=True):
+            del self.embeddings[pos], self.contexts[pos], self.timestamps[pos]
+        self._index = None
+    
+    def _search(self, query: np.ndarray) -> Tuple[float, int]:
+        """Return (similarity, position) of the nearest cached query"""
+        if self._index is None:
+            matrix = np.vstack(self.embeddings)
+            if FAISS_AVAILABLE:
+                self._index = faiss.IndexFlatIP(matrix.shape[1])
+                self._index.add(matrix)
+            else:
+                self._index = matrix
+        
+        if FAISS_AVAILABLE:
+            scores, positions = self._index.search(query, 1)
+            return float(scores[0, 0]), int(positions[0, 0])
+        
+        scores = cos_sim_matrix(query, self._index)[0]
+        best = int(np.argmax(scores))
+        return float(scores[best]), best
+    
+    def get(self, embedding: np.ndarray) -> Optional[str]:
+        """Return the cached context of a sufficiently similar query, if any"""
+        now = time.time()
+        expired = [i for i, ts in enumerate(self.timestamps) if now - ts > self.ttl]
+        if expired:
+            self._evict(expired)
+        
+        if self.embeddings:
+            similarity, pos = self._search(embedding.reshape(1, -1))
+            if similarity >= self.threshold:
+                self.hits += 1
+                return self.contexts[pos]
+        
+        self.misses += 1
+        return None
+    
+    def put(self, embedding: np.ndarray, context: str):
+        """Cache a compiled context, evicting the oldest entry when full"""
+        if len(self.embeddings) >= self.max_entries:
+            self._evict([0])
+        
+        self.embeddings.append(embedding)
+        self.contexts.append(context)
+        self.timestamps.append(time.time())
+        self._index = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit-rate statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.embeddings),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+class LayerMetrics:
+    """Per-layer context load latency and failure counters"""
+    
+    def __init__(self):
+        self.stats: Dict[str, Dict[str, float]] = {}
+    
+    def observe(self, layer: str, seconds: float, failed: bool = False):
+        """Record one loader call"""
+        stat = self.stats.get(layer)
+        if stat is None:
+            stat = self.stats[layer] = {'calls': 0, 'failures': 0, 'total_time': 0.0, 'max_time': 0.0}
+        stat['calls'] += 1
+        stat['failures'] += failed
+        stat['total_time'] += seconds
+        if seconds > stat['max_time']:
+            stat['max_time'] = seconds
+    
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get per-layer call counts and timings"""
+        return {
+            layer: {**stat, 'avg_time': stat['total_time'] / stat['calls']}
+            for layer, stat in self.stats.items()
+        }
+
+_LAYER_METRICS = LayerMetrics()
+
+def safe_layer(name: str, fallback: str):
+    """Wrap a context loader: time it, and log and return fallback on error"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                _LAYER_METRICS.observe(name, time.perf_counter() - start, failed=True)
+                logger.error(f"Error loading {name} context: {e}")
+                return fallback
+            _LAYER_METRICS.observe(name, time.perf_counter() - start)
+            return result
+        return wrapper
+    return decorator
+
+class _PreparedConnection(asyncpg.Connection):
+    """Pooled connection that carries its own prepared _SQL statements"""
+    __slots__ = ('prepared_statements',)
+
+async def _init_connection(conn):
+    """Per-connection setup: decode json/jsonb columns and prepare the _SQL statements"""
+    for json_type in ('json', 'jsonb'):
+        await conn.set_type_codec(
+            json_type, encoder=json.dumps, decoder=json.loads, schema='pg_catalog'
+        )
+    
+    prepared = {}
+    for sql_key, query in _SQL.items():
+        try:
+            prepared[sql_key] = await conn.prepare(query)
+        except asyncpg.PostgresError as e:
+            # e.g. a table missing from this database; that layer falls back to fetch()
+            logger.warning(f"Could not prepare {sql_key} query: {e}")
+    conn.prepared_statements = prepared
+
+async def create_db_pool(db_config: Dict[str, Any]) -> asyncpg.Pool:
+    """Create an asyncpg connection pool (CAGContextManager borrows its cache warmer's)"""
+    return await asyncpg.create_pool(
+        host=db_config['host'],
+        port=db_config['port'],
+        database=db_config['dbname'],
+        user=db_config['user'],
+        password=db_config['password'],
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        max_inactive_connection_lifetime=300,
+        init=_init_connection,
+        connection_class=_PreparedConnection
+    )
 
 class CAGContextManager:
     """Context manager for CAG system with intelligent context assembly"""
     
-    def __init__(self, max_tokens: int = 128000, db_config: Dict[str, Any] = None):
+    def __init__(self, max_tokens: int = 128000, db_config: Dict[str, Any] = None,
+                 cache_warmer: Optional['CacheWarmingEngine'] = None):
         self.max_tokens = max_tokens
         self.db_config = db_config or {}
+        self.cache_warmer = cache_warmer
         self.embedding_model = None
-        self.context_cache = {}
+        # Per-session semantic query caches, least recently used session first
+        self.context_cache: OrderedDict = OrderedDict()
         self.context_templates = {}
+        self._pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
         
         # Context layer token allocations
         self.layer_allocations = {
@@ -96,315 +648,278 @@ class CAGContextManager:
     def _initialize_embedding_model(self):
         """Initialize embedding model for semantic search"""
         try:
-            # Mock embedding model - in production, use sentence-transformers
-            self.embedding_model = "mock_embedding_model"
+            # Share the warmer's model so queries and cached items live in one space
+            if self.cache_warmer and self.cache_warmer.embedding_model:
+                self.embedding_model = self.cache_warmer.embedding_model
+            else:
+                self.embedding_model = BatchEmbedder()
             logger.info("Embedding model initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize embedding model: {e}")
             self.embedding_model = None
     
-    async def get_connection(self):
-        """Get database connection"""
+    async def get_pool(self) -> asyncpg.Pool:
+        """Get the connection pool, creating it on first use"""
+        # Share the warmer's pool so an engine holds one set of backends, not two;
+        # close() then leaves it to the warmer since self._pool stays unset
+        if self.cache_warmer is not None:
+            return await self.cache_warmer.get_pool()
+        
         if not self.db_config:
             raise ValueError("Database configuration not provided")
         
-        return await psycopg.AsyncConnection.connect(
-            host=self.db_config['host'],
-            port=self.db_config['port'],
-            dbname=self.db_config['dbname'],
-            user=self.db_config['user'],
-            password=self.db_config['password'],
-            row_factory=dict_row
-        )
+        async with self._pool_lock:
+            if self._pool is None:
+                self._pool = await create_db_pool(self.db_config)
+        return self._pool
+    
+    @asynccontextmanager
+    async def get_connection(self):
+        """Acquire a pooled database connection"""
+        pool = await self.get_pool()
+        async with pool.acquire() as conn:
+            yield conn
+    
+    async def close(self):
+        """Close the connection pool"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
     
     def count_tokens(self, text: str) -> int:
-        """Estimate token count (rough approximation)"""
-        if not text:
-            return 0
-        return int(len(text.split()) * 1.3)  # Approximate tokens
+        """Count tokens in text"""
+        return count_tokens(text)
     
     def _generate_embedding(self, text: str) -> Optional[np.ndarray]:
         """Generate embedding for text"""
+        embeddings = self._generate_embeddings([text])
+        return embeddings[0] if embeddings else None
+    
+    def _generate_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+        """Generate embeddings for a batch of texts in one model call"""
         if not self.embedding_model:
-            return None
+            return []
         
         try:
-            # Mock embedding generation - in production, use actual model
-            embedding = np.random.random(768).astype(np.float32)
-            return embedding
+            return self.embedding_model.embed(texts)
         except Exception as e:
             logger.error(f"Embedding generation failed: {e}")
-            return None
+            return []
     
     async def load_context_for_query(self, query: str, session_id: str) -> str:
         """Load optimal context for query"""
         # Generate query embedding for semantic search
         query_embedding = self._generate_embedding(query)
         
-        # Load all context layers
-        context_layers = {}
-        
-        # System context (always loaded)
-        context_layers[ContextLayer.SYSTEM] = await self._load_system_context()
-        
-        # Project context
-        context_layers[ContextLayer.PROJECT] = await self._load_project_context(query)
-        
-        # Session context
-        context_layers[ContextLayer.SESSION] = await self._load_session_context(session_id)
-        
-        # Domain context (semantic search)
-        context_layers[ContextLayer.DOMAIN] = await self._load_domain_context(
-            query, query_embedding
-        )
+        # Serve semantically equivalent queries from the per-session cache
+        query_cache = None
+        if query_embedding is not None:
+            query_cache = self.context_cache.get(session_id)
+            if query_cache is None:
+                query_cache = self.context_cache[session_id] = SemanticQueryCache()
+                if len(self.context_cache) > QUERY_CACHE_MAX_SESSIONS:
+                    self.context_cache.popitem(last=False)
+            else:
+                self.context_cache.move_to_end(session_id)
+            cached_context = query_cache.get(query_embedding)
+            if cached_context is not None:
+                return cached_context
         
-        # Experience context
-        context_layers[ContextLayer.EXPERIENCE] = await self._load_experience_context(
-            query, query_embedding
-        )
+        # System context is constant; the next five layers are independent,
+        # so load them concurrently, each on its own pooled connection
+        layer_coros = {
+            ContextLayer.PROJECT: self._load_project_context(query),
+            ContextLayer.SESSION: self._load_session_context(session_id),
+            ContextLayer.DOMAIN: self._load_domain_context(query, query_embedding),
+            ContextLayer.EXPERIENCE: self._load_experience_context(query, query_embedding),
+            ContextLayer.STRATEGIC: self._load_strategic_context(query, query_embedding)
+        }
+        results = await asyncio.gather(*layer_coros.values(), return_exceptions=True)
         
-        # Strategic context
-        context_layers[ContextLayer.STRATEGIC] = await self._load_strategic_context(
-            query, query_embedding
-        )
+        context_layers = {ContextLayer.SYSTEM: _SYSTEM_CONTEXT}
+        for layer, result in zip(layer_coros, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error loading {layer.value} context: {result}")
+                result = _UNAVAILABLE_CONTEXT[layer]
+            context_layers[layer] = result
         
-        # Dynamic context (additional relevant content)
+        # Dynamic context depends on the token budget left by the other layers
         context_layers[ContextLayer.DYNAMIC] = await self._load_dynamic_context(
             query, query_embedding, context_layers
         )
         
         # Compile context with token management
-        return self._compile_context(context_layers)
+        compiled_context = self._compile_context(context_layers)
+        
+        if query_cache is not None:
+            query_cache.put(query_embedding, compiled_context)
+        
+        return compiled_context
+    
+    def get_layer_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Get per-layer load latency and failure counts"""
+        return _LAYER_METRICS.get_stats()
+    
+    def end_session(self, session_id: str):
+        """Drop an ended session's query cache"""
+        self.context_cache.pop(session_id, None)
+    
+    def get_query_cache_stats(self) -> Dict[str, Any]:
+        """Get semantic query cache statistics across sessions"""
+        hits = sum(cache.hits for cache in self.context_cache.values())
+        misses = sum(cache.misses for cache in self.context_cache.values())
+        return {
+            'sessions': len(self.context_cache),
+            'entries': sum(len(cache.embeddings) for cache in self.context_cache.values()),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0
+        }
     
     async def _load_system_context(self) -> str:
         """Load system context"""
-        system_context = """
-        CAG System - Cache-Augmented Generation
-        - Pattern Intelligence Architecture
-        - Semantic Knowledge Classification
-        - Context-Aware Knowledge Retrieval
-        - Multi-layer Context Management
-        - Error Recovery and Graceful Degradation
-        
-        Current Session: Knowledge Persistence AI System
-        Capabilities: Pattern extraction, semantic search, strategic insights
-        """
-        return system_context.strip()
+        return _SYSTEM_CONTEXT
     
+    @safe_layer("project", "Project context unavailable due to error")
     async def _load_project_context(self, query: str) -> str:
         """Load project-specific context"""
-        try:
-            if not self.db_config:
-                return "Project context unavailable - no database configuration"
-            
-            conn = await self.get_connection()
-            async with conn.cursor() as cur:
-                # Get project information
-                await cur.execute("""
-                    SELECT name, display_name, description, settings
-                    FROM projects
-                    WHERE name = 'knowledge-persistence-ai'
-                    OR name = 'KnowledgePersistence-AI'
-                    LIMIT 1
-                """)
-                project = await cur.fetchone()
-                
-                if project:
-                    context = f"""
-                    Project: {project['display_name']}
-                    Description: {project['description']}
-                    Settings: {json.dumps(project['settings'], indent=2)}
-                    """
-                    
-                    # Get recent project activity
-                    await cur.execute("""
-                        SELECT title, content, knowledge_type, created_at
-                        FROM knowledge_items
-                        WHERE project_id = (
-                            SELECT id FROM projects WHERE name = %s
-                        )
-                        ORDER BY created_at DESC
-                        LIMIT 3
-                    """, (project['name'],))
-                    
-                    recent_items = await cur.fetchall()
-                    if recent_items:
-                        context += "\n\nRecent Project Activity:\n"
-                        for item in recent_items:
-                            context += f"- [{item['knowledge_type']}] {item['title']}\n"
-                    
-                    await conn.close()
-                    return context.strip()
-                else:
-                    await conn.close()
-                    return "Project context not available"
-                    
-        except Exception as e:
-            logger.error(f"Error loading project context: {e}")
-            return "Project context unavailable due to error"
+        if not self.db_config:
+            return "Project context unavailable - no database configuration"
+        
+        # Project row and its recent activity in one round trip
+        rows = await self._fetch_rows("project")
+        
+        if not rows:
+            return "Project context not available"
+        
+        project = rows[0]
+        context = f"""
+        Project: {project['display_name']}
+        Description: {project['description']}
+        Settings: {json.dumps(project['settings'], indent=2)}
+        """
+        
+        parts = [context]
+        recent_items = [row for row in rows if row['title'] is not None]
+        if recent_items:
+            parts.append("\n\nRecent Project Activity:\n")
+            parts.extend(
+                f"- [{item['knowledge_type']}] {item['title']}\n" for item in recent_items
+            )
+        
+        return "".join(parts).strip()
     
+    @safe_layer("session", "Session context unavailable")
     async def _load_session_context(self, session_id: str) -> str:
         """Load session-specific context"""
-        try:
-            if not self.db_config:
-                return f"Session context unavailable - no database configuration: {session_id}"
-            
-            conn = await self.get_connection()
-            async with conn.cursor() as cur:
-                # Get session information
-                await cur.execute("""
-                    SELECT session_identifier, start_time, total_interactions,
-                           user_context, session_metadata
-                    FROM ai_sessions
-                    WHERE id = %s OR session_identifier = %s
-                    ORDER BY start_time DESC
-                    LIMIT 1
-                """, (session_id, session_id))
-                
-                session = await cur.fetchone()
-                
-                if session:
-                    context = f"""
-                    Session: {session['session_identifier']}
-                    Started: {session['start_time']}
-                    Interactions: {session['total_interactions']}
-                    """
-                    
-                    # Get recent session knowledge
-                    await cur.execute("""
-                        SELECT title, content, knowledge_type, created_at
-                        FROM knowledge_items
-                        WHERE session_id = (
-                            SELECT id FROM ai_sessions WHERE session_identifier = %s
-                        )
-                        ORDER BY created_at DESC
-                        LIMIT 5
-                    """, (session['session_identifier'],))
-                    
-                    recent_items = await cur.fetchall()
-                    if recent_items:
-                        context += "\n\nRecent Session Knowledge:\n"
-                        for item in recent_items:
-                            context += f"- {item['title'][:100]}...\n"
-                    
-                    await conn.close()
-                    return context.strip()
-                else:
-                    await conn.close()
-                    return f"New session: {session_id}"
-                    
-        except Exception as e:
-            logger.error(f"Error loading session context: {e}")
-            return f"Session context unavailable: {session_id}"
+        if not self.db_config:
+            return f"Session context unavailable - no database configuration: {session_id}"
+        
+        # Session row and its recent knowledge in one round trip
+        rows = await self._fetch_rows("session", (session_id,))
+        
+        if not rows:
+            return f"New session: {session_id}"
+        
+        session = rows[0]
+        context = f"""
+        Session: {session['session_identifier']}
+        Started: {session['start_time']}
+        Interactions: {session['total_interactions']}
+        """
+        
+        parts = [context]
+        recent_items = [row for row in rows if row['title'] is not None]
+        if recent_items:
+            parts.append("\n\nRecent Session Knowledge:\n")
+            parts.extend(f"- {item['title'][:100]}...\n" for item in recent_items)
+        
+        return "".join(parts).strip()
     
+    @safe_layer("domain", "Domain context unavailable due to error")
     async def _load_domain_context(self, query: str, query_embedding: Optional[np.ndarray]) -> str:
         """Load domain-specific context using semantic search"""
-        try:
-            if not self.db_config:
-                return "Domain context unavailable - no database configuration"
-            
-            conn = await self.get_connection()
-            async with conn.cursor() as cur:
-                # Fall back to full-text search
-                await cur.execute("""
-                    SELECT title, content, knowledge_type, importance_score,
-                           ts_rank(full_text_search, plainto_tsquery('english', %s)) as rank
-                    FROM knowledge_items
-                    WHERE full_text_search @@ plainto_tsquery('english', %s)
-                    AND is_active = true
-                    ORDER BY rank DESC, importance_score DESC
-                    LIMIT 10
-                """, (query, query))
-                
-                items = await cur.fetchall()
-                
-                if items:
-                    context = "Domain Knowledge:\n"
-                    for item in items:
-                        context += f"- [{item['knowledge_type']}] {item['title']}\n"
-                        context += f"  {item['content'][:150]}...\n"
-                    
-                    await conn.close()
-                    return context.strip()
-                else:
-                    await conn.close()
-                    return "No relevant domain knowledge found"
-                    
-        except Exception as e:
-            logger.error(f"Error loading domain context: {e}")
-            return "Domain context unavailable due to error"
+        # Serve from the warm cache's vector index when it has relevant items; mock
+        # embeddings all look alike, so without a real model go straight to full-text search
+        if (self.cache_warmer and query_embedding is not None
+                and self.embedding_model is not None and self.embedding_model.is_semantic
+                and self.cache_warmer.embedding_model is not None
+                and self.cache_warmer.embedding_model.is_semantic):
+            cached_items = self.cache_warmer.search_cached(query_embedding)
+            if cached_items:
+                parts = ["Domain Knowledge:\n"]
+                parts.extend(
+                    f"- [{item.knowledge_type.value}] {item.title}\n  {item.content[:150]}...\n"
+                    for item in (cache_item.knowledge_item for cache_item in cached_items)
+                )
+                return "".join(parts).strip()
+        
+        if not self.db_config:
+            return "Domain context unavailable - no database configuration"
+        
+        # Fall back to full-text search
+        return await self._load_formatted(
+            "domain", (query,), "Domain Knowledge:\n", self._fmt_domain, "No relevant domain knowledge found"
+        )
+    
+    async def _fetch_rows(self, sql_key: str, params: tuple = ()) -> List[asyncpg.Record]:
+        """Run one of the _SQL queries on a pooled connection"""
+        async with self.get_connection() as conn:
+            # Pool proxies forward attribute access to the underlying _PreparedConnection
+            statement = getattr(conn, 'prepared_statements', {}).get(sql_key)
+            if statement is not None:
+                return await statement.fetch(*params)
+            return await conn.fetch(_SQL[sql_key], *params)
+    
+    async def _load_formatted(self, sql_key: str, params: tuple, header: str,
+                              formatter: Callable[[asyncpg.Record], str], empty_message: str) -> str:
+        """Load a layer as one formatted line block per row under a header"""
+        if not self.db_config:
+            return f"{sql_key.capitalize()} context unavailable - no database configuration"
+        
+        items = await self._fetch_rows(sql_key, params)
+        if not items:
+            return empty_message
+        
+        parts = [header]
+        parts.extend(map(formatter, items))
+        return "".join(parts).strip()
     
+    @staticmethod
+    def _fmt_domain(item: asyncpg.Record) -> str:
+        """Format one domain knowledge row"""
+        return f"- [{item['knowledge_type']}] {item['title']}\n  {item['content'][:150]}...\n"
+    
+    @staticmethod
+    def _fmt_experience(item: asyncpg.Record) -> str:
+        """Format one experience row"""
+        return f"- {item['title']}\n  {item['content'][:100]}...\n"
+    
+    @staticmethod
+    def _fmt_strategic(item: asyncpg.Record) -> str:
+        """Format one strategic insight row"""
+        return f"- [{item['insight_type']}] {item['title']}\n  {item['description'][:100]}...\n"
+    
+    @staticmethod
+    def _fmt_dynamic(item: asyncpg.Record) -> str:
+        """Format one dynamic context row"""
+        return f"- [{item['knowledge_type']}] {item['title']}\n  {item['content'][:100]}...\n"
+    
+    @safe_layer("experience", "Experience context unavailable")
     async def _load_experience_context(self, query: str, query_embedding: Optional[np.ndarray]) -> str:
         """Load experience-based context"""
-        try:
-            if not self.db_config:
-                return "Experience context unavailable - no database configuration"
-            
-            conn = await self.get_connection()
-            async with conn.cursor() as cur:
-                await cur.execute("""
-                    SELECT title, content, created_at, importance_score
-                    FROM knowledge_items
-                    WHERE knowledge_type = 'experiential'
-                    AND is_active = true
-                    AND (title ILIKE %s OR content ILIKE %s)
-                    ORDER BY importance_score DESC, created_at DESC
-                    LIMIT 5
-                """, (f'%{query}%', f'%{query}%'))
-                
-                items = await cur.fetchall()
-                
-                if items:
-                    context = "Experience Context:\n"
-                    for item in items:
-                        context += f"- {item['title']}\n"
-                        context += f"  {item['content'][:100]}...\n"
-                    
-                    await conn.close()
-                    return context.strip()
-                else:
-                    await conn.close()
-                    return "No relevant experience found"
-                    
-        except Exception as e:
-            logger.error(f"Error loading experience context: {e}")
-            return "Experience context unavailable"
+        return await self._load_formatted(
+            "experience", (query,), "Experience Context:\n", self._fmt_experience, "No relevant experience found"
+        )
     
+    @safe_layer("strategic", "Strategic context unavailable")
     async def _load_strategic_context(self, query: str, query_embedding: Optional[np.ndarray]) -> str:
         """Load strategic insights context"""
-        try:
-            if not self.db_config:
-                return "Strategic context unavailable - no database configuration"
-            
-            conn = await self.get_connection()
-            async with conn.cursor() as cur:
-                await cur.execute("""
-                    SELECT title, description, insight_type, confidence_score
-                    FROM strategic_insights
-                    WHERE is_active = true
-                    AND (title ILIKE %s OR description ILIKE %s)
-                    ORDER BY confidence_score DESC, created_at DESC
-                    LIMIT 5
-                """, (f'%{query}%', f'%{query}%'))
-                
-                items = await cur.fetchall()
-                
-                if items:
-                    context = "Strategic Insights:\n"
-                    for item in items:
-                        context += f"- [{item['insight_type']}] {item['title']}\n"
-                        context += f"  {item['description'][:100]}...\n"
-                    
-                    await conn.close()
-                    return context.strip()
-                else:
-                    await conn.close()
-                    return "No strategic insights found"
-                    
-        except Exception as e:
-            logger.error(f"Error loading strategic context: {e}")
-            return "Strategic context unavailable"
+        return await self._load_formatted(
+            "strategic", (query,), "Strategic Insights:\n", self._fmt_strategic, "No strategic insights found"
+        )
     
+    @safe_layer("dynamic", "Dynamic context unavailable")
     async def _load_dynamic_context(self, query: str, query_embedding: Optional[np.ndarray], 
                                   existing_context: Dict[ContextLayer, str]) -> str:
         """Load additional dynamic context based on remaining token budget"""
@@ -417,136 +932,154 @@ class CAGContextManager:
         if remaining_tokens < 1000:
             return "Dynamic context: Token budget exhausted"
         
-        try:
-            if not self.db_config:
-                return "Dynamic context unavailable - no database configuration"
+        if not self.db_config:
+            return "Dynamic context unavailable - no database configuration"
+        
+        # Get additional relevant content
+        items = await self._fetch_rows("dynamic", (query,))
+        
+        if not items:
+            return "No additional context found"
+        
+        header = "Additional Context:\n"
+        parts = [header]
+        context_tokens = self.count_tokens(header)
+        for item in items:
+            item_content = self._fmt_dynamic(item)
             
-            conn = await self.get_connection()
-            async with conn.cursor() as cur:
-                # Get additional relevant content
-                await cur.execute("""
-                    SELECT title, content, knowledge_type, created_at
-                    FROM knowledge_items
-                    WHERE is_active = true
-                    AND (title ILIKE %s OR content ILIKE %s)
-                    AND knowledge_type IN ('procedural', 'technical', 'patterns')
-                    ORDER BY created_at DESC
-                    LIMIT 3
-                """, (f'%{query}%', f'%{query}%'))
-                
-                items = await cur.fetchall()
-                
-                if items:
-                    context = "Additional Context:\n"
-                    for item in items:
-                        item_content = f"- [{item['knowledge_type']}] {item['title']}\n"
-                        item_content += f"  {item['content'][:100]}...\n"
-                        
-                        # Check if we have token budget for this item
-                        if self.count_tokens(context + item_content) > remaining_tokens:
-                            break
-                        
-                        context += item_content
-                    
-                    await conn.close()
-                    return context.strip()
-                else:
-                    await conn.close()
-                    return "No additional context found"
-                    
-        except Exception as e:
-            logger.error(f"Error loading dynamic context: {e}")
-            return "Dynamic context unavailable"
+            # Check if we have token budget for this item, counting
+            # only the new piece rather than re-encoding the whole context
+            item_tokens = self.count_tokens(item_content)
+            if context_tokens + item_tokens > remaining_tokens:
+                break
+            
+            parts.append(item_content)
+            context_tokens += item_tokens
+        
+        return "".join(parts).strip()
     
     def _compile_context(self, context_layers: Dict[ContextLayer, str]) -> str:
         """Compile context layers into final context string"""
-        compiled_context = []
+        buffer = io.StringIO()
         
-        for layer in ContextLayer:
-            if layer in context_layers and context_layers[layer]:
-                compiled_context.append(f"=== {layer.value.upper()} CONTEXT ===")
-                compiled_context.append(context_layers[layer])
-                compiled_context.append("")
+        for layer in _LAYER_ORDER:
+            content = context_layers.get(layer)
+            if content:
+                buffer.write(_LAYER_HEADERS[layer])
+                buffer.write(content)
+                buffer.write("\n\n")
         
-        return "\n".join(compiled_context)
+        # Drop the final blank line so sections end exactly as before
+        return buffer.getvalue()[:-1]
 
 class CacheWarmingEngine:
     """Cache warming engine for proactive knowledge loading"""
     
-    def __init__(self, db_config: Dict[str, Any]):
+    def __init__(self, db_config: Dict[str, Any], enabled_layers: Optional[Iterable[str]] = None,
+                 max_items: int = CACHE_MAX_ITEMS, max_bytes: int = CACHE_MAX_BYTES):
         self.db_config = db_config
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        # Layers worth caching; items routed to any other layer are skipped at preload
+        self.enabled_layers: frozenset = frozenset(enabled_layers or CACHE_LAYERS)
         self.warm_cache: Dict[str, CacheItem] = {}
+        # Secondary index of warm_cache entries by cache layer
+        self._by_layer: Dict[str, Dict[str, CacheItem]] = defaultdict(dict)
+        # Running totals behind cache_stats, adjusted on every insert/removal;
+        # priorities live in a dense array (one slot per cached key) for bulk stats
+        self._priorities = np.zeros(CACHE_STATS_INITIAL_CAPACITY, dtype=np.float64)
+        self._slot_of: Dict[str, int] = {}
+        self._slot_keys: List[str] = []
+        self._bytes_sum = 0
+        self._layer_counts: Dict[str, int] = defaultdict(int)
+        # Min-heap of (-priority, insertion seq, cache key) over warm_cache
+        self._prio_heap: List[Tuple[float, int, str]] = []
+        self._heap_seq = itertools.count()
+        # Eviction tiers, each an LRU of cache keys (oldest first)
+        self._tiers: Dict[str, OrderedDict] = {'high': OrderedDict(), 'mid': OrderedDict(), 'low': OrderedDict()}
+        self._session_keys: Dict[str, set] = defaultdict(set)
+        self._evictions = 0
         self.cache_stats = {
             'total_items': 0,
             'cache_layers': {},
             'average_priority': 0.0,
             'memory_usage_estimate': 0,
+            'evictions': 0,
             'last_warming': None
         }
         self.embedding_model = None
+        self._pool: Optional[asyncpg.Pool] = None
+        self._pool_lock = asyncio.Lock()
+        # Vector index over cached embeddings, rebuilt lazily after cache changes
+        self._index = None
+        self._id_map: List[str] = []
         self._initialize_embedding_model()
     
     def _initialize_embedding_model(self):
         """Initialize embedding model"""
         try:
-            # Mock embedding model - in production, use sentence-transformers
-            self.embedding_model = "mock_embedding_model"
+            self.embedding_model = BatchEmbedder()
             logger.info("Cache warming embedding model initialized")
         except Exception as e:
             logger.error(f"Failed to initialize embedding model for cache: {e}")
             self.embedding_model = None
     
+    async def get_pool(self) -> asyncpg.Pool:
+        """Get the shared connection pool, creating it on first use"""
+        async with self._pool_lock:
+            if self._pool is None:
+                self._pool = await create_db_pool(self.db_config)
+        return self._pool
+    
+    @asynccontextmanager
     async def get_connection(self):
-        """Get database connection"""
-        return await psycopg.AsyncConnection.connect(
-            host=self.db_config['host'],
-            port=self.db_config['port'],
-            dbname=self.db_config['dbname'],
-            user=self.db_config['user'],
-            password=self.db_config['password'],
-            row_factory=dict_row
-        )
+        """Acquire a pooled database connection"""
+        pool = await self.get_pool()
+        async with pool.acquire() as conn:
+            yield conn
+    
+    async def close(self):
+        """Close the connection pool"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
     
     def calculate_cache_priority(self, item: Dict[str, Any]) -> float:
         """Calculate cache priority for a knowledge item"""
-        priority = 0.0
-        
-        # Base importance score (0-1)
-        importance = item.get('importance_score', 50) / 100
-        priority += importance * 0.3
-        
-        # Knowledge type weighting
-        type_weights = {
-            'procedural': 0.9,
-            'technical': 0.8,
-            'experiential': 0.7,
-            'strategic': 0.85,
-            'contextual': 0.6,
-            'patterns': 0.8,
-            'factual': 0.5,
-            'relational': 0.4
-        }
+        return float(self._compute_priorities([item])[0])
+    
+    @staticmethod
+    def _created_epoch(created_at) -> float:
+        """Creation time as epoch seconds (NaN when unknown)"""
+        if not created_at:
+            return np.nan
+        if isinstance(created_at, str):
+            created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+        return created_at.timestamp()
+    
+    def _compute_priorities(self, items: List[Dict[str, Any]]) -> np.ndarray:
+        """Calculate cache priorities for a batch of items in one vectorized pass"""
+        importance = np.fromiter(
+            (item.get('importance_score', 50) for item in items), dtype=np.float32, count=len(items)
+        ) / 100
+        type_weight = np.fromiter(
+            (CACHE_TYPE_WEIGHTS.get(item.get('knowledge_type', 'factual'), 0.5) for item in items),
+            dtype=np.float32, count=len(items)
+        )
+        usage = np.minimum(np.fromiter(
+            (item.get('usage_count', 0) for item in items), dtype=np.float32, count=len(items)
+        ) / 10, 1.0)  # Cap at 10 uses
         
-        knowledge_type = item.get('knowledge_type', 'factual')
-        type_weight = type_weights.get(knowledge_type, 0.5)
-        priority += type_weight * 0.3
-        
-        # Usage frequency
-        usage_count = item.get('usage_count', 0)
-        usage_factor = min(usage_count / 10, 1.0)  # Cap at 10 uses
-        priority += usage_factor * 0.2
-        
-        # Recency factor
-        created_at = item.get('created_at')
-        if created_at:
-            if isinstance(created_at, str):
-                created_at = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-            
-            days_old = (datetime.now() - created_at.replace(tzinfo=None)).days
-            recency_factor = max(0, 1 - (days_old / 30))  # Decay over 30 days
-            priority += recency_factor * 0.2
+        # Recency decays linearly over 30 days; unknown creation times score 0
+        created = np.fromiter(
+            (self._created_epoch(item.get('created_at')) for item in items),
+            dtype=np.float64, count=len(items)
+        )
+        days_old = np.floor((time.time() - created) / 86400)
+        recency = np.nan_to_num(np.clip(1 - days_old / 30, 0.0, 1.0), nan=0.0).astype(np.float32)
         
-        return min(1.0, priority)
+        priorities = 0.3 * importance + 0.3 * type_weight + 0.2 * usage + 0.2 * recency
+        return np.minimum(priorities, 1.0)
     
     def determine_cache_layer(self, item: Dict[str, Any]) -> str:
         """Determine appropriate cache layer for item"""
@@ -595,7 +1128,7 @@ class CacheWarmingEngine:
             # Phase 2: Load session-specific knowledge
             logger.info("Phase 2: Loading session-specific knowledge...")
             session_items = await self._load_session_knowledge(session_id, user_context)
-            self.preload_to_context(session_items)
+            self.preload_to_context(session_items, session_id=session_id)
             cache_stats['phases_completed'] += 1
             cache_stats['items_loaded'] += len(session_items)
             
@@ -624,9 +1157,8 @@ class CacheWarmingEngine:
     async def _load_core_knowledge(self) -> List[Dict[str, Any]]:
         """Load core knowledge items for caching"""
         try:
-            conn = await self.get_connection()
-            async with conn.cursor() as cur:
-                await cur.execute("""
+            async with self.get_connection() as conn:
+                items = await conn.fetch("""
                     SELECT id, title, content, knowledge_type, semantic_type,
                            importance_score, usage_count, created_at
                     FROM knowledge_items
@@ -636,9 +1168,6 @@ class CacheWarmingEngine:
                     LIMIT 20
                 """)
                 
-                items = await cur.fetchall()
-                await conn.close()
-                
                 return [dict(item) for item in items]
                 
         except Exception as e:
@@ -648,41 +1177,35 @@ class CacheWarmingEngine:
     async def _load_session_knowledge(self, session_id: str, user_context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Load session-specific knowledge"""
         try:
-            conn = await self.get_connection()
-            async with conn.cursor() as cur:
+            async with self.get_connection() as conn:
                 # Get knowledge from this session
-                await cur.execute("""
+                session_items = await conn.fetch("""
                     SELECT ki.id, ki.title, ki.content, ki.knowledge_type, 
                            ki.semantic_type, ki.importance_score, ki.usage_count, ki.created_at
                     FROM knowledge_items ki
                     JOIN ai_sessions s ON ki.session_id = s.id
-                    WHERE s.session_identifier = %s
+                    WHERE s.session_identifier = $1
                     AND ki.is_active = true
                     ORDER BY ki.created_at DESC
                     LIMIT 15
-                """, (session_id,))
-                
-                session_items = await cur.fetchall()
+                """, session_id)
                 
                 # Get knowledge related to user context keywords
                 keywords = user_context.get('keywords', [])
                 if keywords:
                     keyword_query = ' | '.join(keywords)
-                    await cur.execute("""
+                    keyword_items = await conn.fetch("""
                         SELECT id, title, content, knowledge_type, semantic_type,
                                importance_score, usage_count, created_at
                         FROM knowledge_items
-                        WHERE full_text_search @@ plainto_tsquery('english', %s)
+                        WHERE full_text_search @@ plainto_tsquery('english', $1)
                         AND is_active = true
-                        ORDER BY ts_rank(full_text_search, plainto_tsquery('english', %s)) DESC
+                        ORDER BY ts_rank(full_text_search, plainto_tsquery('english', $1)) DESC
                         LIMIT 10
-                    """, (keyword_query, keyword_query))
+                    """, keyword_query)
                     
-                    keyword_items = await cur.fetchall()
                     session_items.extend(keyword_items)
                 
-                await conn.close()
-                
                 return [dict(item) for item in session_items]
                 
         except Exception as e:
@@ -692,10 +1215,9 @@ class CacheWarmingEngine:
     async def _load_predictive_knowledge(self, user_context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Load predictive knowledge based on patterns"""
         try:
-            conn = await self.get_connection()
-            async with conn.cursor() as cur:
+            async with self.get_connection() as conn:
                 # Get recently successful patterns
-                await cur.execute("""
+                items = await conn.fetch("""
                     SELECT ki.id, ki.title, ki.content, ki.knowledge_type, 
                            ki.semantic_type, ki.importance_score, ki.usage_count, ki.created_at
                     FROM knowledge_items ki
@@ -706,115 +1228,320 @@ class CacheWarmingEngine:
                     LIMIT 12
                 """)
                 
-                items = await cur.fetchall()
-                await conn.close()
-                
                 return [dict(item) for item in items]
                 
         except Exception as e:
             logger.error(f"Error loading predictive knowledge: {e}")
             return []
     
-    def preload_to_context(self, knowledge_items: List[Dict[str, Any]]):
-        """Preload knowledge items to cache"""
-        for item in knowledge_items:
-            # Calculate cache priority
-            cache_priority = self.calculate_cache_priority(item)
-            
-            # Determine cache layer
-            cache_layer = self.determine_cache_layer(item)
-            
+    def _embed_items(self, knowledge_items: List[Dict[str, Any]]) -> List[Optional[np.ndarray]]:
+        """Embed item contents in one batch, stored at half precision"""
+        if not self.embedding_model:
+            return [None] * len(knowledge_items)
+        
+        try:
+            embeddings = np.asarray(
+                self.embedding_model.embed([item['content'] for item in knowledge_items]),
+                dtype=np.float32
+            )
+        except Exception as e:
+            logger.error(f"Embedding cached items failed: {e}")
+            return [None] * len(knowledge_items)
+        
+        # Already unit length from the embedder
+        return list(embeddings.astype(EMBEDDING_STORE_DTYPE))
+    
+    def preload_to_context(self, knowledge_items: List[Dict[str, Any]], session_id: Optional[str] = None):
+        """Preload knowledge items to cache, tagging them with the owning session if given"""
+        # Route items to layers first so disabled layers cost no scoring or embedding
+        routed = [(item, self.determine_cache_layer(item)) for item in knowledge_items]
+        routed = [(item, layer) for item, layer in routed if layer in self.enabled_layers]
+        if not routed:
+            return
+        knowledge_items = [item for item, _ in routed]
+        
+        # Calculate cache priorities for the whole batch at once
+        priorities = self._compute_priorities(knowledge_items)
+        embeddings = self._embed_items(knowledge_items)
+        replaced = False
+        
+        for (item, cache_layer), cache_priority, embedding in zip(routed, priorities.tolist(), embeddings):
             # Create KnowledgeItem
             knowledge_item = KnowledgeItem(
                 id=item['id'],
                 title=item['title'],
                 content=item['content'],
-                knowledge_type=KnowledgeType(item['knowledge_type']),
+                knowledge_type=_KT_BY_VALUE.get(item['knowledge_type'], KnowledgeType.FACTUAL),
                 semantic_type=item.get('semantic_type'),
                 importance_score=item.get('importance_score', 50),
                 usage_count=item.get('usage_count', 0),
-                created_at=item.get('created_at', datetime.now())
+                created_at=item.get('created_at', datetime.now()),
+                embedding=embedding
             )
             
             # Create cache item
             cache_item = CacheItem(
                 knowledge_item=knowledge_item,
                 cache_priority=cache_priority,
-                cache_layer=cache_layer
+                cache_layer=cache_layer,
+                session_id=session_id
             )
             
-            # Store in cache
+            # Store in cache, replacing any earlier copy of the same item
             cache_key = f"{cache_layer}:{item['id']}"
+            if cache_key in self.warm_cache:
+                self._remove(cache_key)
+                replaced = True
             self.warm_cache[cache_key] = cache_item
+            self._by_layer[cache_layer][cache_key] = cache_item
+            self._tiers[self._tier_for(cache_priority)][cache_key] = None
+            if session_id is not None:
+                self._session_keys[session_id].add(cache_key)
+            self._account(cache_key, cache_item, 1)
+            heapq.heappush(self._prio_heap, (-cache_priority, next(self._heap_seq), cache_key))
+        
+        evicted = self._enforce_limits()
+        
+        # Replaced and evicted items leave stale heap entries behind; rebuild once per batch
+        if replaced or evicted:
+            self._rebuild_priority_heap()
+        
+        self._index = None
+    
+    @staticmethod
+    def _tier_for(priority: float) -> str:
+        """Eviction tier for a cache priority"""
+        if priority >= CACHE_TIER_HIGH:
+            return 'high'
+        if priority >= CACHE_TIER_MID:
+            return 'mid'
+        return 'low'
+    
+    def _remove(self, cache_key: str) -> CacheItem:
+        """Drop an entry from the cache and all of its indexes"""
+        item = self.warm_cache.pop(cache_key)
+        del self._by_layer[item.cache_layer][cache_key]
+        for tier in self._tiers.values():
+            tier.pop(cache_key, None)
+        if item.session_id is not None:
+            self._session_keys[item.session_id].discard(cache_key)
+        self._account(cache_key, item, -1)
+        return item
     
-    def get_cached_knowledge(self, layer: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get cached knowledge items, optionally filtered by layer"""
+    def _over_limits(self) -> bool:
+        return len(self.warm_cache) > self.max_items or self._bytes_sum > self.max_bytes
+    
+    def _enforce_limits(self) -> int:
+        """Evict LRU low-, then mid-priority items until within bounds"""
+        evicted = 0
+        for tier_name in ('low', 'mid'):
+            tier = self._tiers[tier_name]
+            while tier and self._over_limits():
+                self._remove(next(iter(tier)))
+                evicted += 1
+        
+        if evicted:
+            self._evictions += evicted
+            logger.info(f"Evicted {evicted} cache items")
+        return evicted
+    
+    def retire_session(self, session_id: str) -> int:
+        """Downgrade an ended session's items so they are evicted first"""
+        keys = self._session_keys.pop(session_id, set())
+        low = self._tiers['low']
+        for key in keys:
+            self._tiers['high'].pop(key, None)
+            self._tiers['mid'].pop(key, None)
+            low[key] = None
+            low.move_to_end(key, last=False)
+            self.warm_cache[key].session_id = None
+        return len(keys)
+    
+    def _rebuild_priority_heap(self):
+        """Rebuild the priority heap from the current warm cache"""
+        self._heap_seq = itertools.count()
+        self._prio_heap = [
+            (-item.cache_priority, next(self._heap_seq), key)
+            for key, item in self.warm_cache.items()
+        ]
+        heapq.heapify(self._prio_heap)
+    
+    def _build_index(self):
+        """Stack cached embeddings into an inner-product index"""
+        self._id_map = [
+            key for key, item in self.warm_cache.items()
+            if item.knowledge_item.embedding is not None
+        ]
+        if not self._id_map:
+            self._index = None
+            return
+        
+        matrix = np.vstack([
+            self.warm_cache[key].knowledge_item.embedding for key in self._id_map
+        ]).astype(np.float32)
+        
+        if FAISS_AVAILABLE:
+            self._index = faiss.IndexFlatIP(matrix.shape[1])
+            self._index.add(matrix)
+        else:
+            self._index = matrix
+    
+    def search_cached(self, query_embedding: np.ndarray, k: int = CACHE_SEARCH_TOP_K,
+                      threshold: float = CACHE_SEARCH_THRESHOLD) -> List[CacheItem]:
+        """Find the cached items most similar to a query embedding"""
+        if self._index is None:
+            self._build_index()
+            if self._index is None:
+                return []
+        
+        query = query_embedding.reshape(1, -1)
+        
+        if FAISS_AVAILABLE:
+            scores, positions = self._index.search(query, min(k, len(self._id_map)))
+            scores, positions = scores[0], positions[0]
+        else:
+            all_scores = cos_sim_matrix(query, self._index)[0]
+            positions = np.argsort(-all_scores)[:k]
+            scores = all_scores[positions]
+        
+        keys = [
+            self._id_map[pos]
+            for score, pos in zip(scores.tolist(), positions.tolist())
+            if pos >= 0 and score >= threshold
+        ]
+        
+        # Record the hits so eviction treats them as recently used
+        now = datetime.now()
+        for key in keys:
+            item = self.warm_cache[key]
+            item.access_count += 1
+            item.last_accessed = now
+            for tier in self._tiers.values():
+                if key in tier:
+                    tier.move_to_end(key)
+                    break
+        
+        return [self.warm_cache[key] for key in keys]
+    
+    @staticmethod
+    def _project_items(cache_items, fields: Iterable[str] = _PROJECT_KEYS) -> List[Dict[str, Any]]:
+        """Project cache items into plain dicts holding only the requested fields"""
+        project = _projector(tuple(fields))
+        return [project(item) for item in cache_items]
+    
+    def get_cached_knowledge(self, layer: Optional[str] = None, limit: Optional[int] = None,
+                             fields: Iterable[str] = _PROJECT_KEYS) -> List[Dict[str, Any]]:
+        """Get cached knowledge items by descending priority, optionally filtered by layer"""
         if layer:
-            items = [
-                {
-                    'id': item.knowledge_item.id,
-                    'title': item.knowledge_item.title,
-                    'content': item.knowledge_item.content,
-                    'knowledge_type': item.knowledge_item.knowledge_type.value,
-                    'cache_priority': item.cache_priority,
-                    'cache_layer': item.cache_layer,
-                    'access_count': item.access_count
-                }
-                for key, item in self.warm_cache.items()
-                if item.cache_layer == layer
-            ]
+            layer_items = self._by_layer.get(layer, {}).values()
+            if limit is None:
+                cache_items = sorted(layer_items, key=_cache_priority, reverse=True)
+            else:
+                cache_items = heapq.nlargest(limit, layer_items, key=_cache_priority)
         else:
-            items = [
-                {
-                    'id': item.knowledge_item.id,
-                    'title': item.knowledge_item.title,
-                    'content': item.knowledge_item.content,
-                    'knowledge_type': item.knowledge_item.knowledge_type.value,
-                    'cache_priority': item.cache_priority,
-                    'cache_layer': item.cache_layer,
-                    'access_count': item.access_count
-                }
-                for item in self.warm_cache.values()
+            if limit is None:
+                entries = sorted(self._prio_heap)
+            else:
+                entries = heapq.nsmallest(limit, self._prio_heap)
+            cache_items = [self.warm_cache[key] for _, _, key in entries]
+        
+        return self._project_items(cache_items, fields)
+    
+    def get_cached_knowledge_iter(self, layer: Optional[str] = None, limit: Optional[int] = None,
+                                  fields: Iterable[str] = _PROJECT_KEYS) -> Iterator[Dict[str, Any]]:
+        """Yield cached knowledge items by descending priority, popping a heap copy lazily"""
+        project = _projector(tuple(fields))
+        if layer:
+            heap = [
+                (-item.cache_priority, seq, key)
+                for seq, (key, item) in enumerate(self._by_layer.get(layer, {}).items())
             ]
+            heapq.heapify(heap)
+        else:
+            heap = self._prio_heap.copy()
         
-        return sorted(items, key=lambda x: x['cache_priority'], reverse=True)
+        remaining = len(heap) if limit is None else limit
+        while heap and remaining > 0:
+            _, _, key = heapq.heappop(heap)
+            item = self.warm_cache.get(key)
+            # Skip items evicted since the generator started
+            if item is None:
+                continue
+            remaining -= 1
+            yield project(item)
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
         return self.cache_stats
     
+    def _account(self, cache_key: str, item: CacheItem, sign: int):
+        """Add (sign=1) or remove (sign=-1) an item's share of the running stats"""
+        embedding = item.knowledge_item.embedding
+        if sign > 0:
+            self._add_slot(cache_key, item.cache_priority)
+        else:
+            self._remove_slot(cache_key)
+        self._bytes_sum += sign * (
+            item.content_len + (embedding.nbytes if embedding is not None else 0)
+        )
+        self._layer_counts[item.cache_layer] += sign
+        if not self._layer_counts[item.cache_layer]:
+            del self._layer_counts[item.cache_layer]
+    
+    def _add_slot(self, cache_key: str, priority: float):
+        """Append a key's priority to the dense array, growing it if full"""
+        slot = len(self._slot_keys)
+        if slot == len(self._priorities):
+            self._priorities = np.concatenate([self._priorities, np.zeros_like(self._priorities)])
+        self._priorities[slot] = priority
+        self._slot_of[cache_key] = slot
+        self._slot_keys.append(cache_key)
+    
+    def _remove_slot(self, cache_key: str):
+        """Remove a key's priority by moving the last slot into its place"""
+        slot = self._slot_of.pop(cache_key)
+        last_key = self._slot_keys.pop()
+        if last_key != cache_key:
+            self._priorities[slot] = self._priorities[len(self._slot_keys)]
+            self._slot_keys[slot] = last_key
+            self._slot_of[last_key] = slot
+    
     def _update_cache_stats(self):
         """Update cache statistics"""
         if not self.warm_cache:
             return
         
-        priorities = [item.cache_priority for item in self.warm_cache.values()]
-        layers = {}
-        
-        for item in self.warm_cache.values():
-            layer = item.cache_layer
-            if layer not in layers:
-                layers[layer] = 0
-            layers[layer] += 1
-        
         self.cache_stats = {
             'total_items': len(self.warm_cache),
-            'cache_layers': layers,
-            'average_priority': sum(priorities) / len(priorities),
-            'memory_usage_estimate': sum(
-                len(item.knowledge_item.content) for item in self.warm_cache.values()
-            ),
+            'cache_layers': dict(self._layer_counts),
+            'average_priority': float(self._priorities[:len(self._slot_keys)].mean()),
+            'memory_usage_estimate': self._bytes_sum,
+            'evictions': self._evictions,
             'last_warming': datetime.now()
         }
     
     def clear_cache(self):
         """Clear the warm cache"""
         self.warm_cache.clear()
+        self._by_layer.clear()
+        self._prio_heap = []
+        for tier in self._tiers.values():
+            tier.clear()
+        self._session_keys.clear()
+        self._evictions = 0
+        self._priorities = np.zeros(CACHE_STATS_INITIAL_CAPACITY, dtype=np.float64)
+        self._slot_of.clear()
+        self._slot_keys = []
+        self._bytes_sum = 0
+        self._layer_counts.clear()
+        self._index = None
+        self._id_map = []
         self.cache_stats = {
             'total_items': 0,
             'cache_layers': {},
             'average_priority': 0.0,
             'memory_usage_estimate': 0,
+            'evictions': 0,
             'last_warming': None
         }
         logger.info("Cache cleared")
@@ -844,6 +1571,8 @@ async def test_components():
         print(f"Estimated tokens: {context_manager.count_tokens(context)}")
     except Exception as e:
         print(f"Context manager test failed: {e}")
+    finally:
+        await context_manager.close()
     
     # Test Cache Warmer
     print("\nTesting Cache Warmer...")
@@ -866,6 +1595,8 @@ async def test_components():
         
     except Exception as e:
         print(f"Cache warmer test failed: {e}")
+    finally:
+        await cache_warmer.close()
 
 if __name__ == "__main__":
     asyncio.run(test_components())
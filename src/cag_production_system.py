@@ -7,19 +7,46 @@ Combines pattern intelligence architecture with robust MCP integration
 import asyncio
 import json
 import logging
+import re
 import time
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Set, Tuple, Union, Any
 from datetime import datetime
-from enum import Enum
+from enum import Enum, IntEnum
 from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
 import aiohttp
-from tenacity import retry, stop_after_attempt, wait_exponential
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Query retry policy: exponential backoff of 2**(attempt-1) seconds, clamped to [min, max]
+QUERY_RETRY_ATTEMPTS = 3
+QUERY_RETRY_MIN_WAIT = 4
+QUERY_RETRY_MAX_WAIT = 10
+
+# Numbered list item, e.g. "1. Install dependencies"
+_STEP_RE = re.compile(r'(?:^|\n)\s*\d+\.\s*([^\n]+)')
+_WORD_RE = re.compile(r'\w+')
+
+# Pattern extractor cue words: single words are tested against the content's
+# token set, multi-word phrases with one precompiled alternation
+_PROCESS_WORDS = frozenset({'first', 'then', 'next', 'finally', 'after', 'before'})
+_CAUSAL_WORDS = frozenset({'because', 'since', 'causes'})
+_CAUSAL_PHRASES = re.compile(r'\b(?:due to|results in|leads to)\b')
+_DEPENDENCY_WORDS = frozenset({'requires', 'needs', 'prerequisite'})
+_DEPENDENCY_PHRASES = re.compile(r'\bdepends on\b')
+_RECURRING_WORDS = frozenset({'often', 'usually', 'typically', 'commonly', 'frequently'})
+
+# Extractor output: (type, title, content, confidence), enriched into dicts once
+PatternTuple = Tuple[str, str, Any, float]
+
 class SystemState(Enum):
     """System operational state"""
     HEALTHY = "healthy"
@@ -49,7 +76,7 @@ class ContextLayer(Enum):
     DYNAMIC = "dynamic"
     RESPONSE = "response"
 
-@dataclass
+@dataclass(slots=True)
 class SystemHealth:
     """System health tracking"""
     state: SystemState
@@ -62,47 +89,72 @@ class SystemHealth:
     error_count: int = 0
     warnings: List[str] = field(default_factory=list)
 
+class BreakerState(IntEnum):
+    """Circuit breaker state"""
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+_BREAKER_STATE_NAMES = {
+    BreakerState.CLOSED: 'closed',
+    BreakerState.OPEN: 'open',
+    BreakerState.HALF_OPEN: 'half-open'
+}
+
 class CircuitBreaker:
     """Circuit breaker for resilient external calls"""
+    __slots__ = ('failure_threshold', 'recovery_timeout', 'failure_count', 'last_failure_time',
+                 '_state', '_reopen_at')
+    
     def __init__(self, failure_threshold: int = 5, recovery_timeout: int = 60):
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self.failure_count = 0
         self.last_failure_time = None
-        self.state = 'closed'  # closed, open, half-open
+        self._state = BreakerState.CLOSED
+        # Monotonic time at which an open breaker may be retried
+        self._reopen_at = 0.0
+    
+    @property
+    def state(self) -> str:
+        """State name: closed, open or half-open"""
+        return _BREAKER_STATE_NAMES[self._state]
     
     def can_execute(self) -> bool:
-        if self.state == 'closed':
+        state = self._state
+        if state == BreakerState.CLOSED:
             return True
-        elif self.state == 'open':
-            if time.time() - self.last_failure_time > self.recovery_timeout:
-                self.state = 'half-open'
-                return True
-            return False
-        else:  # half-open
+        if state == BreakerState.OPEN and time.monotonic() >= self._reopen_at:
+            self._state = BreakerState.HALF_OPEN
             return True
+        return state == BreakerState.HALF_OPEN
     
     def record_success(self):
         self.failure_count = 0
-        self.state = 'closed'
+        self._state = BreakerState.CLOSED
     
     def record_failure(self):
         self.failure_count += 1
-        self.last_failure_time = time.time()
+        self.last_failure_time = time.monotonic()
         if self.failure_count >= self.failure_threshold:
-            self.state = 'open'
+            self._state = BreakerState.OPEN
+            self._reopen_at = self.last_failure_time + self.recovery_timeout
+
+_NO_REQUIRED_PARAMS = frozenset()
 
 class MCPToolRegistry:
     """Registry for MCP tools with dynamic discovery"""
     def __init__(self):
         self.tools = {}
         self.schemas = {}
+        self.required_sets: Dict[str, frozenset] = {}
         self.health_checks = {}
     
     def register_tool(self, name: str, tool_func, schema: Dict, health_check=None):
         """Register an MCP tool with schema validation"""
         self.tools[name] = tool_func
         self.schemas[name] = schema
+        self.required_sets[name] = frozenset(schema.get('required', []))
         if health_check:
             self.health_checks[name] = health_check
     
@@ -123,24 +175,19 @@ class MCPToolRegistry:
     
     def _validate_params(self, tool_name: str, params: Dict) -> bool:
         """Validate parameters against tool schema"""
-        schema = self.schemas.get(tool_name, {})
-        required_params = schema.get('required', [])
-        
-        for param in required_params:
-            if param not in params:
-                return False
-        
-        return True
+        return self.required_sets.get(tool_name, _NO_REQUIRED_PARAMS).issubset(params)
 
 class SemanticKnowledgeClassifier:
     """Semantic classification system for knowledge types"""
     def __init__(self):
         self.type_embeddings = {}
         self.classification_rules = self._build_classification_rules()
+        self._keyword_types: List[List[int]] = []
+        self._keyword_automaton = self._build_keyword_automaton() if AHOCORASICK_AVAILABLE else None
     
     def _build_classification_rules(self) -> Dict:
         """Build semantic classification rules"""
-        return {
+        rules = {
             KnowledgeType.FACTUAL: {
                 'keywords': ['fact', 'data', 'statistic', 'definition', 'what is'],
                 'patterns': [r'\b\w+ is \w+', r'\b\w+ equals \w+', r'\b\w+ means \w+'],
@@ -182,34 +229,99 @@ class SemanticKnowledgeClassifier:
                 'confidence_threshold': 0.8
             }
         }
+        
+        for rule in rules.values():
+            rule['compiled_patterns'] = [re.compile(pattern) for pattern in rule['patterns']]
+            # Keywords and patterns each contribute up to half of a type's score
+            rule['kw_scale'] = 0.5 / len(rule['keywords']) if rule['keywords'] else 0.0
+            rule['pat_scale'] = 0.5 / len(rule['patterns']) if rule['patterns'] else 0.0
+            rule['pat_max'] = len(rule['patterns']) * rule['pat_scale']
+        
+        return rules
+    
+    def _build_keyword_automaton(self):
+        """Build one Aho-Corasick automaton over every rule keyword"""
+        automaton = ahocorasick.Automaton()
+        keyword_ids = {}
+        
+        for type_index, rules in enumerate(self.classification_rules.values()):
+            for keyword in rules['keywords']:
+                if keyword not in keyword_ids:
+                    keyword_ids[keyword] = len(self._keyword_types)
+                    self._keyword_types.append([])
+                    automaton.add_word(keyword, keyword_ids[keyword])
+                self._keyword_types[keyword_ids[keyword]].append(type_index)
+        
+        automaton.make_automaton()
+        return automaton
+    
+    def _count_keyword_matches(self, content_lower: str) -> List[int]:
+        """Count distinct keywords present per rule, in rule order"""
+        if self._keyword_automaton is None:
+            return [
+                sum(1 for keyword in rules['keywords'] if keyword in content_lower)
+                for rules in self.classification_rules.values()
+            ]
+        
+        # Single pass over the content; each keyword counts once however often it occurs
+        hits = [0] * len(self.classification_rules)
+        for keyword_id in {keyword_id for _, keyword_id in self._keyword_automaton.iter(content_lower)}:
+            for type_index in self._keyword_types[keyword_id]:
+                hits[type_index] += 1
+        return hits
     
-    def classify_knowledge(self, content: str) -> Dict[KnowledgeType, float]:
+    @staticmethod
+    def _pattern_score(rules: Dict, content_lower: str) -> float:
+        """Pattern half of a type's score"""
+        pattern_matches = sum(1 for pattern in rules['compiled_patterns'] if pattern.search(content_lower))
+        return pattern_matches * rules['pat_scale']
+    
+    def classify_knowledge(self, content: str, content_lower: Optional[str] = None) -> Dict[KnowledgeType, float]:
         """Classify knowledge content with confidence scores"""
-        content_lower = content.lower()
+        if content_lower is None:
+            content_lower = content.lower()
+        keyword_hits = self._count_keyword_matches(content_lower)
         scores = {}
         
-        for knowledge_type, rules in self.classification_rules.items():
-            score = 0.0
-            
-            # Keyword matching
-            keyword_matches = sum(1 for keyword in rules['keywords'] if keyword in content_lower)
-            score += (keyword_matches / len(rules['keywords'])) * 0.5
-            
-            # Pattern matching
-            import re
-            pattern_matches = sum(1 for pattern in rules['patterns'] if re.search(pattern, content_lower))
-            if rules['patterns']:
-                score += (pattern_matches / len(rules['patterns'])) * 0.5
+        for (knowledge_type, rules), keyword_matches in zip(self.classification_rules.items(), keyword_hits):
+            # Keyword matching, then pattern matching
+            score = keyword_matches * rules['kw_scale']
+            score += self._pattern_score(rules, content_lower)
             
             scores[knowledge_type] = score
         
         return scores
     
-    def get_best_classification(self, content: str) -> tuple[KnowledgeType, float]:
-        """Get the best knowledge type classification"""
-        scores = self.classify_knowledge(content)
-        best_type = max(scores, key=scores.get)
-        return best_type, scores[best_type]
+    def get_best_classification(self, content: str,
+                                content_lower: Optional[str] = None) -> tuple[KnowledgeType, float]:
+        """Get the best knowledge type classification
+        
+        Keyword scores come from one pass; types are then scored in order of
+        their best possible total and pattern matching stops once no remaining
+        type can beat (or tie ahead of) the current best.
+        """
+        if content_lower is None:
+            content_lower = content.lower()
+        keyword_hits = self._count_keyword_matches(content_lower)
+        
+        candidates = []
+        for index, ((knowledge_type, rules), keyword_matches) in enumerate(
+                zip(self.classification_rules.items(), keyword_hits)):
+            keyword_score = keyword_matches * rules['kw_scale']
+            bound = keyword_score + rules['pat_max']
+            candidates.append((bound, -index, keyword_score, knowledge_type, rules))
+        candidates.sort(key=lambda candidate: candidate[:2], reverse=True)
+        
+        # Ties resolve to the earliest rule, as max() over classify_knowledge did
+        best_key, best_type = (-1.0, 0), None
+        for bound, neg_index, keyword_score, knowledge_type, rules in candidates:
+            if (bound, neg_index) < best_key:
+                break
+            score = keyword_score + self._pattern_score(rules, content_lower)
+            if (score, neg_index) > best_key:
+                best_key, best_type = (score, neg_index), knowledge_type
+        
+        return best_type, best_key[0]
 
 class PatternIntelligenceEngine:
     """Pattern intelligence engine with semantic understanding"""
@@ -220,111 +332,90 @@ class PatternIntelligenceEngine:
     
     async def extract_patterns_with_classification(self, content: str, context: Dict) -> List[Dict]:
         """Extract patterns with semantic classification"""
-        patterns = []
+        # Lowercase and tokenize once for classification and all cue-word tests
+        content_lower = content.lower()
+        tokens = set(_WORD_RE.findall(content_lower))
+        
+        # One shared excerpt for every pattern that quotes the content
+        prefix = content[:200] if len(content) > 200 else content
         
         # Classify the content
-        best_type, confidence = self.semantic_classifier.get_best_classification(content)
+        best_type, confidence = self.semantic_classifier.get_best_classification(content, content_lower)
         
-        # Extract patterns based on type
+        # Extract (type, title, content, confidence) tuples based on type
         if best_type == KnowledgeType.PROCEDURAL:
-            patterns.extend(await self._extract_procedural_patterns(content))
+            patterns = self._extract_procedural_patterns(content, tokens, prefix)
         elif best_type == KnowledgeType.RELATIONAL:
-            patterns.extend(await self._extract_relational_patterns(content))
+            patterns = self._extract_relational_patterns(content_lower, tokens, prefix)
         elif best_type == KnowledgeType.PATTERN_RECOGNITION:
-            patterns.extend(await self._extract_meta_patterns(content))
+            patterns = self._extract_meta_patterns(tokens, prefix)
         else:
-            patterns.extend(await self._extract_generic_patterns(content))
+            patterns = self._extract_generic_patterns(content, prefix)
         
-        # Enhance patterns with semantic information
-        for pattern in patterns:
-            pattern['semantic_type'] = best_type.value
-            pattern['classification_confidence'] = confidence
-            pattern['extraction_timestamp'] = datetime.now().isoformat()
-        
-        return patterns
+        # Build the enriched pattern dicts in a single pass
+        semantic_type = best_type.value
+        timestamp = datetime.now().isoformat()
+        return [
+            {
+                'type': pattern_type,
+                'title': title,
+                'content': pattern_content,
+                'confidence': pattern_confidence,
+                'semantic_type': semantic_type,
+                'classification_confidence': confidence,
+                'extraction_timestamp': timestamp
+            }
+            for pattern_type, title, pattern_content, pattern_confidence in patterns
+        ]
     
-    async def _extract_procedural_patterns(self, content: str) -> List[Dict]:
+    def _extract_procedural_patterns(self, content: str, tokens: Set[str], prefix: str) -> List[PatternTuple]:
         """Extract procedural patterns (steps, processes)"""
         patterns = []
         
         # Look for numbered steps
-        import re
-        steps = re.findall(r'(?:^|\n)\s*\d+\.\s*([^\n]+)', content)
+        steps = _STEP_RE.findall(content)
         
         if steps:
-            patterns.append({
-                'type': 'procedural_sequence',
-                'title': 'Step-by-step procedure',
-                'content': steps,
-                'confidence': 0.9
-            })
+            patterns.append(('procedural_sequence', 'Step-by-step procedure', steps, 0.9))
         
         # Look for process keywords
-        process_indicators = ['first', 'then', 'next', 'finally', 'after', 'before']
-        if any(indicator in content.lower() for indicator in process_indicators):
-            patterns.append({
-                'type': 'process_flow',
-                'title': 'Process flow identified',
-                'content': content[:200],
-                'confidence': 0.7
-            })
+        if not _PROCESS_WORDS.isdisjoint(tokens):
+            patterns.append(('process_flow', 'Process flow identified', prefix, 0.7))
         
         return patterns
     
-    async def _extract_relational_patterns(self, content: str) -> List[Dict]:
+    def _extract_relational_patterns(self, content_lower: str, tokens: Set[str],
+                                     prefix: str) -> List[PatternTuple]:
         """Extract relational patterns (cause-effect, dependencies)"""
         patterns = []
         
         # Look for causal relationships
-        causal_keywords = ['because', 'since', 'due to', 'causes', 'results in', 'leads to']
-        if any(keyword in content.lower() for keyword in causal_keywords):
-            patterns.append({
-                'type': 'causal_relationship',
-                'title': 'Causal relationship detected',
-                'content': content[:200],
-                'confidence': 0.8
-            })
+        if not _CAUSAL_WORDS.isdisjoint(tokens) or _CAUSAL_PHRASES.search(content_lower):
+            patterns.append(('causal_relationship', 'Causal relationship detected', prefix, 0.8))
         
         # Look for dependencies
-        dependency_keywords = ['depends on', 'requires', 'needs', 'prerequisite']
-        if any(keyword in content.lower() for keyword in dependency_keywords):
-            patterns.append({
-                'type': 'dependency_relationship',
-                'title': 'Dependency relationship detected',
-                'content': content[:200],
-                'confidence': 0.8
-            })
+        if not _DEPENDENCY_WORDS.isdisjoint(tokens) or _DEPENDENCY_PHRASES.search(content_lower):
+            patterns.append(('dependency_relationship', 'Dependency relationship detected', prefix, 0.8))
         
         return patterns
     
-    async def _extract_meta_patterns(self, content: str) -> List[Dict]:
+    def _extract_meta_patterns(self, tokens: Set[str], prefix: str) -> List[PatternTuple]:
         """Extract meta-patterns (patterns about patterns)"""
         patterns = []
         
         # Look for recurring themes
-        recurring_keywords = ['often', 'usually', 'typically', 'commonly', 'frequently']
-        if any(keyword in content.lower() for keyword in recurring_keywords):
-            patterns.append({
-                'type': 'recurring_pattern',
-                'title': 'Recurring pattern identified',
-                'content': content[:200],
-                'confidence': 0.7
-            })
+        if not _RECURRING_WORDS.isdisjoint(tokens):
+            patterns.append(('recurring_pattern', 'Recurring pattern identified', prefix, 0.7))
         
         return patterns
     
-    async def _extract_generic_patterns(self, content: str) -> List[Dict]:
+    def _extract_generic_patterns(self, content: str, prefix: str) -> List[PatternTuple]:
         """Extract generic patterns"""
         patterns = []
         
         # Basic pattern extraction
         if len(content) > 100:
-            patterns.append({
-                'type': 'content_pattern',
-                'title': 'Content pattern',
-                'content': content[:200],
-                'confidence': 0.5
-            })
+            patterns.append(('content_pattern', 'Content pattern', prefix, 0.5))
         
         return patterns
 
@@ -343,10 +434,22 @@ class ProductionCAGEngine:
             'average_response_time': 0.0
         }
     
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
     async def process_query_with_recovery(self, query: str, session_id: str, user_context: Dict = None) -> Dict:
-        """Process query with comprehensive error recovery"""
+        """Process query with comprehensive error recovery, retrying with backoff"""
+        for attempt in range(1, QUERY_RETRY_ATTEMPTS + 1):
+            try:
+                return await self._process_query_impl(query, session_id, user_context)
+            except Exception as e:
+                if attempt == QUERY_RETRY_ATTEMPTS:
+                    raise
+                delay = min(max(2 ** (attempt - 1), QUERY_RETRY_MIN_WAIT), QUERY_RETRY_MAX_WAIT)
+                logger.warning(f"Query attempt {attempt} failed ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+    
+    async def _process_query_impl(self, query: str, session_id: str, user_context: Dict = None) -> Dict:
+        """Process one query attempt"""
         start_time = time.time()
+        timestamp = datetime.now().isoformat()
         self.metrics['total_queries'] += 1
         
         try:
@@ -359,7 +462,7 @@ class ProductionCAGEngine:
             response = {
                 'query': query,
                 'session_id': session_id,
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': timestamp,
                 'context_loaded': True,
                 'patterns_extracted': len(patterns),
                 'patterns': patterns,
@@ -389,7 +492,7 @@ class ProductionCAGEngine:
             return {
                 'query': query,
                 'session_id': session_id,
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': timestamp,
                 'error': str(e),
                 'context_loaded': False,
                 'patterns_extracted': 0,
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Vector Operations for CAG Components
+Similarity kernels over L2-normalized embeddings (cosine similarity == dot product)
+"""
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _cos_sim_matrix_kernel(A, B):
+        m, n, d = A.shape[0], B.shape[0], A.shape[1]
+        out = np.empty((m, n), np.float32)
+        for i in prange(m):
+            for j in range(n):
+                s = np.float32(0.0)
+                for k in range(d):
+                    s += A[i, k] * B[j, k]
+                out[i, j] = s
+        return out
+
+def cos_sim_matrix(A: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """Cosine similarity matrix (m, n) between rows of A (m, d) and B (n, d)
+
+    Both inputs must already be L2-normalized; half-precision inputs are
+    promoted to float32 before scoring.
+    """
+    A = np.ascontiguousarray(np.atleast_2d(A), dtype=np.float32)
+    B = np.ascontiguousarray(np.atleast_2d(B), dtype=np.float32)
+
+    if NUMBA_AVAILABLE:
+        return _cos_sim_matrix_kernel(A, B)
+    return A @ B.T
+
+def normalize_rows(X: np.ndarray) -> np.ndarray:
+    """L2-normalize each row of X as float32"""
+    X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+    return X / (np.linalg.norm(X, axis=1, keepdims=True) + 1e-12)
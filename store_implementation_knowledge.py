@@ -6,12 +6,19 @@ Store Implementation Knowledge
 Record the self-assessment framework implementation as knowledge for future sessions.
 """
 
+import os
+import sys
 import psycopg
 from psycopg.rows import dict_row
-import json
-from datetime import datetime
+from psycopg.types.json import Jsonb, set_json_dumps
 import uuid
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Database connection
 DB_CONFIG = {
     "host": "192.168.10.90",
@@ -23,7 +30,11 @@ DB_CONFIG = {
 
 def get_db_connection():
     conn_string = f"postgresql://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
-    return psycopg.connect(conn_string, row_factory=dict_row)
+    conn = psycopg.connect(conn_string, row_factory=dict_row)
+    # Jsonb parameters on this connection serialize through orjson
+    if ORJSON_AVAILABLE:
+        set_json_dumps(orjson.dumps, context=conn)
+    return conn
 
 def store_implementation_knowledge():
     """Store knowledge about the self-assessment framework implementation"""
@@ -181,33 +192,39 @@ FUTURE OPPORTUNITIES:
         }
     ]
     
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            for item in knowledge_items:
-                item_id = str(uuid.uuid4())
-                cur.execute("""
-                    INSERT INTO knowledge_items (
-                        id, knowledge_type, category, title, content,
-                        importance_score, context_data, created_by, 
-                        retrieval_triggers, created_at
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    item_id,
-                    item["knowledge_type"],
-                    item["category"],
-                    item["title"],
-                    item["content"],
-                    item["importance_score"],
-                    json.dumps(item["context_data"]),
-                    item["created_by"],
-                    item["retrieval_triggers"],
-                    datetime.now()
-                ))
-                print(f"Stored: {item['title']}")
-            
-            conn.commit()
+    rows = [
+        (
+            uuid.uuid4(),
+            item["knowledge_type"],
+            item["category"],
+            item["title"],
+            item["content"],
+            item["importance_score"],
+            Jsonb(item["context_data"]),
+            item["created_by"],
+            item["retrieval_triggers"]
+        )
+        for item in knowledge_items
+    ]
+    
+    # Pipeline mode queues the inserts and the commit behind a single Sync
+    with get_db_connection() as conn, conn.pipeline(), conn.cursor() as cur:
+        # Prepare the INSERT on first use so every row only sends Bind/Execute
+        conn.prepare_threshold = 0
+        cur.executemany("""
+            INSERT INTO knowledge_items (
+                id, knowledge_type, category, title, content,
+                importance_score, context_data, created_by, 
+                retrieval_triggers
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, rows)
+        
+        conn.commit()
     
-    print(f"\nStored {len(knowledge_items)} knowledge items about self-assessment implementation")
+    # Report the whole batch in one buffered write
+    report = "".join(f"Stored: {item['title']}\n" for item in knowledge_items)
+    sys.stdout.write(f"{report}\nStored {len(knowledge_items)} knowledge items about self-assessment implementation\n")
+    sys.stdout.flush()
 
 if __name__ == "__main__":
     store_implementation_knowledge()
\ No newline at end of file
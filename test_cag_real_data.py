@@ -5,9 +5,39 @@ Validate that MCP integration works with actual knowledge items
 """
 
 import asyncio
+import json
 import time
+import urllib.parse
+import urllib.request
 from cag_mcp_integrated import CAGEngineMCP, MCPKnowledgeClient
 
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+def loads_json(data: bytes):
+    """Parse a JSON response body, preferring orjson (accepts bytes directly)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Seconds an API response is reused before the endpoint is fetched again
+API_CACHE_TTL = 60.0
+
+# Keep-alive connection pool shared by all API calls of one client (aiohttp only;
+# without it each call is a blocking urllib request run in a worker thread)
+API_TIMEOUT = 5.0
+API_MAX_CONNECTIONS = 8
+API_KEEPALIVE_TIMEOUT = 30.0
+
 # Test with real data by modifying the mock client to use actual API calls
 class RealDataMCPClient(MCPKnowledgeClient):
     """MCP client that uses real API calls for testing"""
@@ -15,31 +45,85 @@ class RealDataMCPClient(MCPKnowledgeClient):
     def __init__(self):
         super().__init__()
         self.api_base_url = "http://192.168.10.90:8090"
+        self._cache: dict[str, tuple[float, list]] = {}
+        self._cache_ttl = API_CACHE_TTL
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._session: 'aiohttp.ClientSession | None' = None
+        # Cleared after the first failed call to the server-side search endpoint
+        self._server_search = True
+        # Lowercased title/content/category blobs for the last fetched item list
+        self._search_source: list | None = None
+        self._search_blobs: list[str] = []
+    
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """Lazily create the pooled HTTP session (must run inside the event loop)"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=API_MAX_CONNECTIONS, keepalive_timeout=API_KEEPALIVE_TIMEOUT
+                ),
+                timeout=aiohttp.ClientTimeout(total=API_TIMEOUT)
+            )
+        return self._session
+    
+    async def _fetch(self, key: str, url: str):
+        """Fetch and cache one API response"""
+        if AIOHTTP_AVAILABLE:
+            async with self._get_session().get(url) as response:
+                response.raise_for_status()
+                data = loads_json(await response.read())
+        else:
+            data = await asyncio.to_thread(self._fetch_blocking, url)
+        self._cache[key] = (time.time(), data)
+        return data
+    
+    @staticmethod
+    def _fetch_blocking(url: str):
+        """urllib fallback for _fetch when aiohttp is not installed"""
+        with urllib.request.urlopen(url, timeout=API_TIMEOUT) as response:
+            return loads_json(response.read())
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
         
-    async def _call_real_api(self, endpoint: str, params: dict = None):
-        """Call real API endpoint"""
-        import urllib.request
-        import urllib.parse
-        import json
+    async def _call_real_api(self, endpoint: str, params: dict = None, raise_errors: bool = False):
+        """Call real API endpoint, reusing responses younger than the cache TTL"""
+        query = urllib.parse.urlencode(params) if params else ""
+        key = f"{endpoint}?{query}"
+        cached = self._cache.get(key)
+        if cached and time.time() - cached[0] < self._cache_ttl:
+            return cached[1]
         
         try:
-            if params:
-                url = f"{self.api_base_url}/{endpoint}?" + urllib.parse.urlencode(params)
+            if query:
+                url = f"{self.api_base_url}/{endpoint}?{query}"
             else:
                 url = f"{self.api_base_url}/{endpoint}"
             
-            with urllib.request.urlopen(url) as response:
-                data = json.loads(response.read().decode())
-                return data
+            # Concurrent callers for the same key share a single request
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                inflight = self._inflight[key] = asyncio.ensure_future(self._fetch(key, url))
+            try:
+                return await inflight
+            finally:
+                self._inflight.pop(key, None)
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"API call failed: {e}")
             return []
     
     async def get_contextual_knowledge(self, situation: str, max_results: int = 10) -> list:
         """Get knowledge using real API"""
         try:
-            # Use real knowledge_items endpoint
-            knowledge_items = await self._call_real_api("knowledge_items")
+            # Let the server order and limit, so transfer scales with max_results
+            knowledge_items = await self._call_real_api(
+                "knowledge_items", {"limit": max_results, "order_by": "importance_score desc"}
+            )
             
             # Filter and format for contextual relevance
             results = []
@@ -61,30 +145,54 @@ class RealDataMCPClient(MCPKnowledgeClient):
             print(f"Real API failed, using mock: {e}")
             return await super().get_contextual_knowledge(situation, max_results)
     
+    @staticmethod
+    def _search_result(item: dict) -> dict:
+        """Format an API knowledge item as a search result"""
+        return {
+            "id": item.get("id"),
+            "title": item.get("title", "No title"),
+            "content": item.get("content", "No content"),
+            "knowledge_type": item.get("knowledge_type", "factual"),
+            "category": item.get("category", "general"),
+            "importance_score": 50,
+            "created_at": "2025-07-04T12:00:00"
+        }
+    
     async def search_knowledge(self, query: str, knowledge_types: list = None, limit: int = 10) -> list:
-        """Search knowledge using real API"""
+        """Search knowledge using real API, filtering server-side when the endpoint is available"""
+        if self._server_search:
+            try:
+                # Full-text match against the full_text_search GIN index; only `limit` rows cross the wire
+                matches = await self._call_real_api(
+                    "knowledge_items/search", {"q": query, "limit": limit}, raise_errors=True
+                )
+                filtered_items = [self._search_result(item) for item in matches[:limit]]
+                print(f"Real API: Found {len(filtered_items)} items matching '{query}'")
+                return filtered_items
+            except Exception as e:
+                print(f"Server-side search unavailable, filtering locally: {e}")
+                self._server_search = False
+        
         try:
             knowledge_items = await self._call_real_api("knowledge_items")
             
+            # Lowercase the corpus once per fetch rather than per item per query;
+            # the NUL separator keeps a match from spanning two fields
+            if self._search_source is not knowledge_items:
+                self._search_blobs = [
+                    "\x00".join((item.get("title") or "", item.get("content") or "",
+                                  item.get("category") or "")).lower()
+                    for item in knowledge_items
+                ]
+                self._search_source = knowledge_items
+            
             # Simple search filtering
             query_lower = query.lower()
             filtered_items = []
             
-            for item in knowledge_items:
-                content = item.get("content", "").lower()
-                title = item.get("title", "").lower()
-                category = item.get("category", "").lower()
-                
-                if (query_lower in content or query_lower in title or query_lower in category):
-                    filtered_items.append({
-                        "id": item.get("id"),
-                        "title": item.get("title", "No title"),
-                        "content": item.get("content", "No content"),
-                        "knowledge_type": item.get("knowledge_type", "factual"),
-                        "category": item.get("category", "general"),
-                        "importance_score": 50,
-                        "created_at": "2025-07-04T12:00:00"
-                    })
+            for item, blob in zip(knowledge_items, self._search_blobs):
+                if query_lower in blob:
+                    filtered_items.append(self._search_result(item))
                     
                     if len(filtered_items) >= limit:
                         break
@@ -132,7 +240,16 @@ class CAGEngineRealData(CAGEngineMCP):
         self.context_manager.mcp_client = self.mcp_client
         self.cache_warmer.mcp_client = self.mcp_client
 
-async def test_cag_real_data():
+_engine: CAGEngineRealData | None = None
+
+def get_engine() -> CAGEngineRealData:
+    """Return the shared real-data engine, creating it on first use"""
+    global _engine
+    if _engine is None:
+        _engine = CAGEngineRealData()
+    return _engine
+
+async def test_cag_real_data(engine: CAGEngineRealData = None):
     """Test CAG with real database data"""
     print("=== CAG-MCP REAL DATA INTEGRATION TEST ===")
     print("Testing CAG with actual knowledge items from database...")
@@ -148,7 +265,7 @@ async def test_cag_real_data():
         print("Falling back to mock data...")
         return
     
-    engine = CAGEngineRealData()
+    engine = engine or get_engine()
     
     test_session = "cag-real-data-test"
     test_queries = [
@@ -166,22 +283,25 @@ async def test_cag_real_data():
     
     total_start = time.time()
     
-    for i, query in enumerate(test_queries, 1):
+    # One cache warm, then all queries concurrently against the warm cache
+    responses = await engine.process_queries(test_queries, test_session, user_context)
+    
+    for i, (query, response) in enumerate(zip(test_queries, responses), 1):
         print(f"\n--- Query {i}: {query} ---")
         
-        query_start = time.time()
-        response = await engine.process_query(query, test_session, user_context)
-        query_time = time.time() - query_start
+        query_time = response['performance']['total_processing_time']
+        mcp_integration = response['mcp_integration']
+        full_context = response['full_context']
         
-        print(f"MCP Integration: {response['mcp_integration']['framework_used']}")
-        print(f"Direct DB Access: {response['mcp_integration']['direct_db_access']}")
+        print(f"MCP Integration: {mcp_integration['framework_used']}")
+        print(f"Direct DB Access: {mcp_integration['direct_db_access']}")
         print(f"Context size: {response['context_size_tokens']} tokens")
         print(f"Cached items: {response['cached_knowledge_items']}")
         print(f"Processing time: {query_time:.3f}s")
         print(f"Cache hit: {response['performance']['cache_hit']}")
         
         # Show sample of loaded context
-        context_preview = response['full_context'][:500] + "..." if len(response['full_context']) > 500 else response['full_context']
+        context_preview = full_context[:500] + "..." if len(full_context) > 500 else full_context
         print(f"Context preview: {context_preview}")
     
     total_time = time.time() - total_start
@@ -205,7 +325,7 @@ async def test_cag_real_data():
             print(f"  {i+1}. [{item['knowledge_type']}] {item['title'][:50]}...")
             print(f"      Priority: {item['priority']:.2f}, Source: {item.get('source', 'unknown')}")
 
-async def test_performance_comparison():
+async def test_performance_comparison(real_engine: CAGEngineRealData = None):
     """Compare performance between mock and real data"""
     print("\n=== PERFORMANCE COMPARISON TEST ===")
     
@@ -223,7 +343,7 @@ async def test_performance_comparison():
     
     # Test with real data
     print("Testing with real data...")
-    real_engine = CAGEngineRealData()
+    real_engine = real_engine or get_engine()
     real_start = time.time()
     
     try:
@@ -248,6 +368,13 @@ async def test_performance_comparison():
         print(f"Real data test failed: {e}")
         print("This is expected if database is unavailable")
 
+async def main():
+    """Run both tests on one event loop, sharing the real-data engine's HTTP pool and caches"""
+    try:
+        await test_cag_real_data()
+        await test_performance_comparison()
+    finally:
+        await get_engine().mcp_client.close()
+
 if __name__ == "__main__":
-    asyncio.run(test_cag_real_data())
-    asyncio.run(test_performance_comparison())
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
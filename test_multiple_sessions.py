@@ -6,6 +6,9 @@ Compare analysis quality between sessions
 """
 
 import asyncio
+import os
+from collections import Counter
+from statistics import fmean
 from enhanced_redirection_analyzer import ComprehensiveRedirectionAnalyzer
 
 # Database configuration
@@ -29,14 +32,17 @@ async def test_multiple_sessions():
         "4ae1b8e2-c4d7-496c-99c3-764d80db0e60"
     ]
     
-    session_results = []
+    # Analyze all sessions concurrently over the analyzer's connection pool
+    try:
+        session_results = await asyncio.gather(
+            *(analyzer.analyze_session_redirections(session_id) for session_id in sessions)
+        )
+    finally:
+        await analyzer.close()
     
-    for i, session_id in enumerate(sessions, 1):
+    for i, (session_id, analysis) in enumerate(zip(sessions, session_results), 1):
         print(f"\n=== SESSION {i} ANALYSIS: {session_id} ===")
         
-        analysis = await analyzer.analyze_session_redirections(session_id)
-        session_results.append(analysis)
-        
         if analysis.get('error'):
             print(f"ERROR: {analysis['error']}")
             continue
@@ -69,28 +75,21 @@ async def test_multiple_sessions():
         
         if len(valid_sessions) >= 2:
             # Compare redirection rates
-            rates = [s['redirection_rate'] for s in valid_sessions]
-            avg_rate = sum(rates) / len(rates)
+            avg_rate = fmean(s['redirection_rate'] for s in valid_sessions)
             print(f"Average redirection rate: {avg_rate:.1%}")
             
-            # Compare categories
-            all_categories = []
-            for session in valid_sessions:
-                for redir in session.get('redirection_analyses', []):
-                    all_categories.append(redir['semantic_analysis']['primary_category']['primary'])
-            
-            if all_categories:
-                category_counts = {cat: all_categories.count(cat) for cat in set(all_categories)}
-                print(f"Most common category: {max(category_counts.items(), key=lambda x: x[1])}")
-            
-            # Compare severities
-            all_severities = []
-            for session in valid_sessions:
-                for redir in session.get('redirection_analyses', []):
-                    all_severities.append(redir['semantic_analysis']['severity_assessment']['severity_score'])
+            # Compare categories and severities in one pass over the redirections
+            all_semantics = [
+                redir['semantic_analysis']
+                for session in valid_sessions
+                for redir in session.get('redirection_analyses', [])
+            ]
             
-            if all_severities:
-                avg_severity = sum(all_severities) / len(all_severities)
+            if all_semantics:
+                category_counts = Counter(sem['primary_category']['primary'] for sem in all_semantics)
+                print(f"Most common category: {category_counts.most_common(1)[0]}")
+                
+                avg_severity = fmean(sem['severity_assessment']['severity_score'] for sem in all_semantics)
                 print(f"Average severity score: {avg_severity:.2f}")
         
         print(f"\n=== METHODOLOGY COMPARISON ===")
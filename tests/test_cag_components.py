@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for CAG components
+Run with: python -m unittest discover tests
+"""
+
+import unittest
+
+from src.cag_components import (
+    CAGContextManager, CacheWarmingEngine, QUERY_CACHE_MAX_SESSIONS, SENTENCE_TRANSFORMERS_AVAILABLE
+)
+
+CACHED_ITEMS = [
+    {
+        'id': f'item-{i}',
+        'title': title,
+        'content': content,
+        'knowledge_type': 'procedural',
+        'importance_score': 60
+    }
+    for i, (title, content) in enumerate([
+        ("Deploy the API server", "Restart the uvicorn service after pulling the latest release"),
+        ("Rotate database credentials", "Update DB_PASSWORD in the environment and restart workers"),
+        ("Rebuild the vector index", "Run REINDEX on the hnsw index after bulk loads"),
+        ("Warm the session cache", "Call warm_cache_for_session before the first query"),
+        ("Back up the knowledge base", "Export all knowledge items to NDJSON nightly")
+    ])
+]
+
+@unittest.skipIf(SENTENCE_TRANSFORMERS_AVAILABLE, "covers the mock-embedding fallback")
+class DomainContextMockEmbeddingTest(unittest.IsolatedAsyncioTestCase):
+    """Without a real embedding model the domain layer must not serve cached items by vector"""
+
+    def setUp(self):
+        self.cache_warmer = CacheWarmingEngine({})
+        self.cache_warmer.preload_to_context(CACHED_ITEMS)
+        self.context_manager = CAGContextManager(db_config={}, cache_warmer=self.cache_warmer)
+
+    async def test_unrelated_query_falls_back_to_sql(self):
+        query = "What is the airspeed velocity of an unladen swallow?"
+        query_embedding = self.context_manager.embedding_model.embed([query])[0]
+
+        context = await self.context_manager._load_domain_context(query, query_embedding)
+
+        # Without a db_config the full-text path reports itself unavailable
+        self.assertEqual(context, "Domain context unavailable - no database configuration")
+
+class QueryCacheSessionBoundTest(unittest.IsolatedAsyncioTestCase):
+    """Per-session query caches must not grow without bound"""
+
+    async def test_least_recently_queried_session_is_dropped(self):
+        context_manager = CAGContextManager(db_config={})
+
+        for i in range(QUERY_CACHE_MAX_SESSIONS + 5):
+            await context_manager.load_context_for_query("How do I deploy?", f"session-{i}")
+
+        self.assertEqual(len(context_manager.context_cache), QUERY_CACHE_MAX_SESSIONS)
+        self.assertNotIn("session-0", context_manager.context_cache)
+        self.assertIn(f"session-{QUERY_CACHE_MAX_SESSIONS + 4}", context_manager.context_cache)
+
+        context_manager.end_session(f"session-{QUERY_CACHE_MAX_SESSIONS + 4}")
+        self.assertEqual(len(context_manager.context_cache), QUERY_CACHE_MAX_SESSIONS - 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,30 +5,244 @@ Tool-agnostic scripts for multi-AI and multi-user compatibility
 NO dependencies on specific AI assistants or tools
 """
 
+import atexit
+import functools
+import http.client
 import os
 import sys
 import json
+import threading
 import psycopg
+from concurrent.futures import ThreadPoolExecutor
+from psycopg.rows import dict_row
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterable, List, Optional, Any, Tuple
+
+try:
+    from psycopg_pool import ConnectionPool
+    PSYCOPG_POOL_AVAILABLE = True
+except ImportError:
+    PSYCOPG_POOL_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Batches at least this large are loaded with COPY; smaller ones use executemany
+COPY_MIN_ROWS = 100
+
+# Rows fetched per round trip by the streaming export cursor
+EXPORT_ITERSIZE = 10000
+
+def _json_default(value: Any) -> str:
+    """JSON fallback for datetimes (ISO 8601) and UUIDs"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+# Fields every bulk-added knowledge item must carry
+REQUIRED_ITEM_FIELDS = ('title', 'content', 'knowledge_type')
+
+def _read_ndjson_items(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """Parse NDJSON knowledge items, raising ValueError that names the offending line"""
+    items = []
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {line_number}: invalid JSON ({e})") from e
+        if not isinstance(item, dict):
+            raise ValueError(f"line {line_number}: expected a JSON object")
+        missing = [field for field in REQUIRED_ITEM_FIELDS if field not in item]
+        if missing:
+            raise ValueError(f"line {line_number}: missing {', '.join(missing)}")
+        items.append(item)
+    return items
+
+def _dumps_row(row: Dict[str, Any]) -> bytes:
+    """Serialize one exported row, preferring orjson (native datetime/UUID support)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(row)
+    return json.dumps(row, default=_json_default).encode()
+
+# Connection pool sizing for library/long-running use (the CLI connects directly);
+# set KP_NO_POOL to connect directly there as well
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = 4
+POOL_TIMEOUT = 10.0
+
+# Liveness probe timeout for the API server (seconds)
+API_TIMEOUT = 5.0
+
+# Keep-alive connections to API servers, reused across check_api calls
+_HTTP_CONNECTIONS: Dict[Tuple[str, int], http.client.HTTPConnection] = {}
+
+# Channel the ki_notify trigger (schema/complete_schema_v2.sql) signals on whenever knowledge_items changes
+COUNT_CHANNEL = 'knowledge_items_changed'
+
+# One pool per distinct connection config, shared by every PortableKnowledgeAccess in the process
+_POOLS: Dict[Tuple, 'ConnectionPool'] = {}
+
+@functools.lru_cache(maxsize=1)
+def _env_config() -> Dict[str, Any]:
+    """Connection settings from the environment, parsed once per process (copy before modifying)"""
+    return {
+        'db_host': os.getenv('DB_HOST', 'localhost'),
+        # `or` so an empty DB_PORT/DB_PREPARE_THRESHOLD falls back instead of failing int()
+        'db_port': int(os.getenv('DB_PORT') or '5432'),
+        'db_name': os.getenv('DB_NAME', 'knowledge_persistence'),
+        'db_user': os.getenv('DB_USER', 'postgres'),
+        'db_password': os.getenv('DB_PASSWORD', ''),
+        'db_prepare_threshold': int(os.getenv('DB_PREPARE_THRESHOLD') or '1'),
+    }
+
+def _connect_kwargs(config: Dict[str, Any]) -> Dict[str, Any]:
+    """psycopg connection arguments for a tool config"""
+    return {
+        'host': config['db_host'],
+        'port': config['db_port'],
+        'dbname': config['db_name'],
+        'user': config['db_user'],
+        'password': config['db_password'],
+        # Server-side prepare repeated statements (search, add) from their Nth execution
+        'prepare_threshold': config.get('db_prepare_threshold', 1)
+    }
+
+def _config_key(config: Dict[str, Any]) -> Tuple:
+    """Hashable identity of a config's connection settings"""
+    return tuple(sorted(_connect_kwargs(config).items()))
+
+def _get_pool(config: Dict[str, Any]) -> 'ConnectionPool':
+    """Return the shared pool for a config, opening it on first use"""
+    kwargs = _connect_kwargs(config)
+    key = _config_key(config)
+    pool = _POOLS.get(key)
+    if pool is None:
+        pool = ConnectionPool(
+            kwargs=kwargs, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE, timeout=POOL_TIMEOUT,
+            open=False
+        )
+        # Fail here (PoolTimeout) if the database is unreachable, before the pool is shared
+        try:
+            pool.open(wait=True, timeout=POOL_TIMEOUT)
+        except Exception:
+            pool.close()
+            raise
+        _POOLS[key] = pool
+    return pool
+
+class _CountCache:
+    """Exact knowledge counts for one database, invalidated by NOTIFY from the ki_notify trigger"""
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.values: Dict[str, Any] = {}
+        self.generation = 0
+        self.listening = True
+        self._lock = threading.Lock()
+        # Dedicated autocommit connection: notifications are only delivered outside a transaction
+        self._conn = psycopg.connect(**_connect_kwargs(config), autocommit=True)
+        self._conn.execute(f"LISTEN {COUNT_CHANNEL}")
+        threading.Thread(target=self._listen, name='kp-count-listener', daemon=True).start()
+    
+    def _listen(self):
+        try:
+            for _ in self._conn.notifies():
+                self.invalidate()
+        except psycopg.Error:
+            pass
+        # Without the listener a cached value could go stale, so stop caching
+        self.listening = False
+        self.invalidate()
+    
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self.values.clear()
+    
+    def snapshot(self, name: str) -> Tuple[Optional[Any], int]:
+        """Cached value (None if stale) and the generation to pass back to store()"""
+        with self._lock:
+            return (self.values.get(name) if self.listening else None), self.generation
+    
+    def store(self, name: str, generation: int, value: Any):
+        """Cache a value computed at generation, unless a change arrived meanwhile"""
+        with self._lock:
+            if self.listening and generation == self.generation:
+                self.values[name] = value
+    
+    def close(self):
+        self._conn.close()
+
+# One count cache (and listener connection) per connection config, created on first cached count
+_COUNT_CACHES: Dict[Tuple, _CountCache] = {}
+
+def _get_count_cache(config: Dict[str, Any]) -> _CountCache:
+    """Return the shared count cache for a config, starting its listener on first use"""
+    key = _config_key(config)
+    cache = _COUNT_CACHES.get(key)
+    if cache is None:
+        cache = _CountCache(config)
+        _COUNT_CACHES[key] = cache
+    return cache
+
+def _try_count_cache(config: Dict[str, Any]) -> Optional[_CountCache]:
+    """Shared count cache for a config, or None (count directly) if it cannot LISTEN"""
+    try:
+        return _get_count_cache(config)
+    except Exception as e:
+        print(f"Count cache unavailable, counting directly: {e}")
+        return None
+
+@atexit.register
+def _close_pools():
+    """Close all shared pools at interpreter exit"""
+    for pool in _POOLS.values():
+        pool.close()
+    _POOLS.clear()
+    for http_conn in _HTTP_CONNECTIONS.values():
+        http_conn.close()
+    _HTTP_CONNECTIONS.clear()
+    for cache in _COUNT_CACHES.values():
+        cache.close()
+    _COUNT_CACHES.clear()
 
 class PortableKnowledgeAccess:
-    """Tool-agnostic knowledge access interface"""
+    """Tool-agnostic knowledge access interface
+    
+    Use as a context manager: entering connects (raising if the database is
+    unreachable) and exiting closes or returns the connection.
+    """
+    # search_knowledge fragments per mode: (FROM, WHERE, ORDER BY); the trigram, FTS and
+    # (importance_score, created_at) indexes backing them live in schema/complete_schema_v2.sql
+    SEARCH_MODES = {
+        'substring': ("knowledge_items",
+                      "(title ILIKE %s OR content ILIKE %s)",
+                      "importance_score DESC, created_at DESC"),
+        'similarity': ("knowledge_items",
+                       "(title %% %s OR content %% %s)",
+                       "GREATEST(similarity(title, %s), similarity(content, %s)) DESC"),
+        'fts': ("knowledge_items, plainto_tsquery('english', %s) q",
+                "full_text_search @@ q",
+                "ts_rank(full_text_search, q) DESC, importance_score DESC")
+    }
+    # Search statement text keyed by (mode, type_count, preview), with type_count capped
+    # at 2 (none/one/many), so each shape's SQL is assembled once per process
+    _search_sql: Dict[Tuple[str, int, bool], str] = {}
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, use_pool: bool = True):
         self.config = self._load_config(config_path)
+        # One-shot callers (the CLI) pass use_pool=False to skip the pool's startup and threads
+        self.use_pool = use_pool
         self.connection = None
+        self._pool = None
     
     def _load_config(self, config_path: Optional[str]) -> Dict[str, Any]:
         """Load configuration from file or environment"""
-        config = {
-            'db_host': os.getenv('DB_HOST', 'localhost'),
-            'db_port': int(os.getenv('DB_PORT', '5432')),
-            'db_name': os.getenv('DB_NAME', 'knowledge_persistence'),
-            'db_user': os.getenv('DB_USER', 'postgres'),
-            'db_password': os.getenv('DB_PASSWORD', ''),
-        }
+        config = dict(_env_config())
         
         # Try to load from config file if provided
         if config_path and Path(config_path).exists():
@@ -38,41 +252,62 @@ class PortableKnowledgeAccess:
         
         return config
     
-    def connect(self) -> bool:
-        """Connect to knowledge database"""
-        try:
-            self.connection = psycopg.connect(
-                host=self.config['db_host'],
-                port=self.config['db_port'],
-                dbname=self.config['db_name'],
-                user=self.config['db_user'],
-                password=self.config['db_password']
-            )
-            return True
-        except Exception as e:
-            print(f"Database connection failed: {e}")
-            return False
+    def __enter__(self) -> 'PortableKnowledgeAccess':
+        self.connect()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def connect(self):
+        """Connect to knowledge database, borrowing from the shared pool when available"""
+        if self.use_pool and PSYCOPG_POOL_AVAILABLE and not os.getenv('KP_NO_POOL'):
+            pool = _get_pool(self.config)
+            self.connection = pool.getconn()
+            self._pool = pool
+        else:
+            self.connection = psycopg.connect(**_connect_kwargs(self.config))
     
-    def get_knowledge_count(self) -> Dict[str, int]:
-        """Get count of knowledge items by type"""
-        if not self.connection:
-            if not self.connect():
-                return {}
+    def get_knowledge_count(self, approximate: bool = False, cached: bool = False) -> Dict[str, int]:
+        """Get count of knowledge items by type
+        
+        approximate=True reads planner statistics (pg_class.reltuples, pg_stats) instead
+        of scanning the table; it falls back to exact counts if the table was never analyzed.
+        cached=True (for long-running processes) reuses the last exact counts until a
+        change to knowledge_items is signalled over LISTEN/NOTIFY.
+        """
+        if approximate:
+            estimate = self._estimate_knowledge_count()
+            if estimate:
+                return estimate
+        
+        cache = _try_count_cache(self.config) if cached else None
+        if cache is not None:
+            counts, generation = cache.snapshot('by_type')
+            if counts is not None:
+                return {'total': counts['total'], 'by_type': dict(counts['by_type'])}
         
         try:
-            with self.connection.cursor() as cur:
-                # Total count
-                cur.execute("SELECT COUNT(*) FROM knowledge_items")
-                total = cur.fetchone()[0]
+            # Pipeline both queries so they share one round trip
+            with self.connection.cursor() as total_cur, self.connection.cursor() as type_cur:
+                with self.connection.pipeline():
+                    # Total count
+                    total_cur.execute("SELECT COUNT(*) FROM knowledge_items")
+                    
+                    # Count by type
+                    type_cur.execute("""
+                        SELECT knowledge_type, COUNT(*) 
+                        FROM knowledge_items 
+                        GROUP BY knowledge_type 
+                        ORDER BY COUNT(*) DESC
+                    """)
                 
-                # Count by type
-                cur.execute("""
-                    SELECT knowledge_type, COUNT(*) 
-                    FROM knowledge_items 
-                    GROUP BY knowledge_type 
-                    ORDER BY COUNT(*) DESC
-                """)
-                by_type = dict(cur.fetchall())
+                total = total_cur.fetchone()[0]
+                by_type = dict(type_cur.fetchall())
+                
+                if cache is not None:
+                    cache.store('by_type', generation, {'total': total, 'by_type': dict(by_type)})
+                    cache.store('total', generation, total)
                 
                 return {
                     'total': total,
@@ -82,71 +317,197 @@ class PortableKnowledgeAccess:
             print(f"Query failed: {e}")
             return {}
     
+    def _estimate_knowledge_count(self) -> Optional[Dict[str, int]]:
+        """Estimate counts from catalog statistics, or None if no statistics exist yet"""
+        try:
+            with self.connection.cursor() as total_cur, self.connection.cursor() as type_cur:
+                with self.connection.pipeline():
+                    total_cur.execute("""
+                        SELECT reltuples::bigint FROM pg_class
+                        WHERE oid = 'knowledge_items'::regclass
+                    """)
+                    type_cur.execute("""
+                        SELECT most_common_vals::text::text[], most_common_freqs
+                        FROM pg_stats
+                        WHERE tablename = 'knowledge_items' AND attname = 'knowledge_type'
+                    """)
+                
+                total = total_cur.fetchone()[0]
+                type_stats = type_cur.fetchone()
+            
+            # reltuples is -1 (PG 14+) or 0 before the first VACUUM/ANALYZE
+            if total <= 0 or not type_stats or type_stats[0] is None:
+                return None
+            
+            values, freqs = type_stats
+            by_type = {value: round(freq * total) for value, freq in zip(values, freqs)}
+            return {
+                'total': total,
+                'by_type': dict(sorted(by_type.items(), key=lambda kv: kv[1], reverse=True)),
+                'approximate': True
+            }
+        except Exception as e:
+            print(f"Count estimate failed, counting exactly: {e}")
+            self.connection.rollback()
+            return None
+    
     def search_knowledge(self, query: str, knowledge_types: Optional[List[str]] = None, 
-                        limit: int = 10) -> List[Dict[str, Any]]:
-        """Search knowledge items"""
-        if not self.connection:
-            if not self.connect():
-                return []
+                        limit: int = 10, mode: str = 'substring',
+                        preview_chars: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Search knowledge items
         
+        mode: 'substring' (ILIKE, by importance), 'similarity' (trigram, best match first)
+        or 'fts' (stemmed full-text search, ranked by ts_rank)
+        preview_chars: return a server-truncated 'content_preview' (a highlighted
+        ts_headline snippet in fts mode) instead of the full 'content'
+        """
         try:
-            with self.connection.cursor() as cur:
-                where_clause = "WHERE (title ILIKE %s OR content ILIKE %s)"
-                params = [f"%{query}%", f"%{query}%"]
-                
-                if knowledge_types:
-                    where_clause += " AND knowledge_type = ANY(%s)"
-                    params.append(knowledge_types)
-                
-                cur.execute(f"""
-                    SELECT id, title, content, knowledge_type, category, 
-                           importance_score, created_at
-                    FROM knowledge_items 
-                    {where_clause}
-                    ORDER BY importance_score DESC, created_at DESC
-                    LIMIT %s
-                """, params + [limit])
+            # Parameters in placeholder order: SELECT, FROM, WHERE, ORDER BY, LIMIT
+            select_params = [] if preview_chars is None else [preview_chars]
+            from_params = []
+            order_params = []
+            if mode == 'fts':
+                from_params = [query]
+                where_params = []
+            elif mode == 'similarity':
+                where_params = [query, query]
+                order_params = [query, query]
+            elif mode == 'substring':
+                where_params = [f"%{query}%", f"%{query}%"]
+            else:
+                raise ValueError(f"Unknown search mode: {mode}")
+            
+            type_count = min(len(knowledge_types or ()), 2)
+            if type_count == 1:
+                where_params.append(knowledge_types[0])
+            elif type_count:
+                where_params.append(list(knowledge_types))
+            
+            with self.connection.cursor(row_factory=dict_row) as cur:
+                cur.execute(
+                    self._get_search_sql(mode, type_count, preview_chars is not None),
+                    select_params + from_params + where_params + order_params + [limit]
+                )
                 
-                columns = ['id', 'title', 'content', 'knowledge_type', 
-                          'category', 'importance_score', 'created_at']
-                return [dict(zip(columns, row)) for row in cur.fetchall()]
+                return cur.fetchall()
                 
         except Exception as e:
             print(f"Search failed: {e}")
             return []
     
+    @classmethod
+    def _get_search_sql(cls, mode: str, type_count: int, preview: bool) -> str:
+        """Build (once) and return the search statement for one query shape"""
+        key = (mode, type_count, preview)
+        query = cls._search_sql.get(key)
+        if query is None:
+            from_clause, where_clause, order_clause = cls.SEARCH_MODES[mode]
+            # A single type is compared directly so the planner can use its column statistics
+            if type_count == 1:
+                where_clause += " AND knowledge_type = %s"
+            elif type_count:
+                where_clause += " AND knowledge_type = ANY(%s)"
+            # Only ship as much content as the caller will show
+            if not preview:
+                content_column = "content"
+            elif mode == 'fts':
+                content_column = "left(ts_headline('english', content, q), %s) AS content_preview"
+            else:
+                content_column = "left(content, %s) AS content_preview"
+            query = f"""
+                SELECT id, title, {content_column}, knowledge_type, category, 
+                       importance_score, created_at
+                FROM {from_clause} 
+                WHERE {where_clause}
+                ORDER BY {order_clause}
+                LIMIT %s
+            """
+            cls._search_sql[key] = query
+        return query
+    
     def add_knowledge(self, title: str, content: str, knowledge_type: str,
                      category: str = 'general', importance_score: int = 50) -> Optional[str]:
         """Add new knowledge item"""
-        if not self.connection:
-            if not self.connect():
-                return None
-        
         try:
             with self.connection.cursor() as cur:
                 cur.execute("""
                     INSERT INTO knowledge_items 
-                    (title, content, knowledge_type, category, importance_score, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s)
+                    (title, content, knowledge_type, category, importance_score)
+                    VALUES (%s, %s, %s, %s, %s)
                     RETURNING id
-                """, (title, content, knowledge_type, category, importance_score, datetime.now()))
+                """, (title, content, knowledge_type, category, importance_score))
                 
                 item_id = cur.fetchone()[0]
                 self.connection.commit()
+                self._invalidate_count_cache()
                 return str(item_id)
                 
         except Exception as e:
             print(f"Add knowledge failed: {e}")
             return None
     
-    def export_knowledge(self, output_path: str, format: str = 'json') -> bool:
-        """Export all knowledge to file"""
-        if not self.connection:
-            if not self.connect():
-                return False
+    def add_knowledge_many(self, items: Iterable[Dict[str, Any]]) -> int:
+        """Add many knowledge items in one transaction, returning the number stored
         
+        Each item needs title, content and knowledge_type; category and
+        importance_score default as in add_knowledge.
+        """
         try:
+            # created_at is left to the column default (server clock)
+            rows = []
+            for number, item in enumerate(items, 1):
+                missing = [field for field in REQUIRED_ITEM_FIELDS if field not in item]
+                if missing:
+                    raise ValueError(f"item {number} is missing {', '.join(missing)}")
+                rows.append((item['title'], item['content'], item['knowledge_type'],
+                             item.get('category', 'general'), item.get('importance_score', 50)))
+            if not rows:
+                return 0
+            
             with self.connection.cursor() as cur:
+                if len(rows) >= COPY_MIN_ROWS:
+                    with cur.copy("""
+                        COPY knowledge_items
+                        (title, content, knowledge_type, category, importance_score)
+                        FROM STDIN
+                    """) as copy:
+                        for row in rows:
+                            copy.write_row(row)
+                else:
+                    cur.executemany("""
+                        INSERT INTO knowledge_items 
+                        (title, content, knowledge_type, category, importance_score)
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, rows)
+            
+            self.connection.commit()
+            self._invalidate_count_cache()
+            return len(rows)
+            
+        except Exception as e:
+            self.connection.rollback()
+            print(f"Bulk add failed: {e}")
+            return 0
+    
+    def _invalidate_count_cache(self):
+        """Drop cached counts after our own write, without waiting for its notification"""
+        cache = _COUNT_CACHES.get(_config_key(self.config))
+        if cache is not None:
+            cache.invalidate()
+    
+    def export_knowledge(self, output_path: str, format: str = 'json') -> bool:
+        """Export all knowledge to file, streaming rows from a server-side cursor
+        
+        format: 'json' (a single array) or 'ndjson' (one object per line)
+        """
+        try:
+            format = format.lower()
+            if format not in ('json', 'ndjson'):
+                raise ValueError(f"Unsupported format: {format}")
+            
+            # Binary results skip text escaping/parsing of the large content column
+            with self.connection.cursor(name='export_cur', binary=True, row_factory=dict_row) as cur:
+                cur.itersize = EXPORT_ITERSIZE
                 cur.execute("""
                     SELECT id, title, content, knowledge_type, category,
                            importance_score, created_at, updated_at
@@ -154,21 +515,18 @@ class PortableKnowledgeAccess:
                     ORDER BY created_at DESC
                 """)
                 
-                columns = ['id', 'title', 'content', 'knowledge_type', 
-                          'category', 'importance_score', 'created_at', 'updated_at']
-                items = [dict(zip(columns, row)) for row in cur.fetchall()]
-                
-                # Convert datetime objects to strings
-                for item in items:
-                    for key, value in item.items():
-                        if hasattr(value, 'isoformat'):
-                            item[key] = value.isoformat()
-                
-                if format.lower() == 'json':
-                    with open(output_path, 'w') as f:
-                        json.dump(items, f, indent=2)
-                else:
-                    raise ValueError(f"Unsupported format: {format}")
+                # Write one element at a time instead of building the document in memory
+                with open(output_path, 'wb') as f:
+                    if format == 'ndjson':
+                        for row in cur:
+                            f.write(_dumps_row(row))
+                            f.write(b'\n')
+                    else:
+                        f.write(b'[')
+                        for i, row in enumerate(cur):
+                            f.write(b',\n  ' if i else b'\n  ')
+                            f.write(_dumps_row(row))
+                        f.write(b'\n]\n')
                 
                 return True
                 
@@ -177,17 +535,32 @@ class PortableKnowledgeAccess:
             return False
     
     def close(self):
-        """Close database connection"""
+        """Close database connection, or return it to the pool"""
         if self.connection:
-            self.connection.close()
+            if self._pool is not None:
+                # Read paths never commit; end their transaction so the pool gets an idle connection
+                self.connection.rollback()
+                self._pool.putconn(self.connection)
+                self._pool = None
+            else:
+                self.connection.close()
+            self.connection = None
 
 class PortableSystemStatus:
     """Tool-agnostic system status interface"""
     
     @staticmethod
-    def check_database(config: Dict[str, Any]) -> Dict[str, Any]:
-        """Check database connectivity and status"""
+    def check_database(config: Dict[str, Any], cached: bool = True) -> Dict[str, Any]:
+        """Check database connectivity and status
+        
+        The item COUNT(*) is served from the LISTEN-backed count cache while knowledge_items
+        is unchanged, so repeated checks from a long-lived caller skip the table scan.
+        cached=False always counts (one-shot callers that would only pay for the listener).
+        """
         try:
+            cache = _try_count_cache(config) if cached else None
+            count, generation = cache.snapshot('total') if cache is not None else (None, 0)
+            
             conn = psycopg.connect(
                 host=config['db_host'],
                 port=config['db_port'],
@@ -196,12 +569,17 @@ class PortableSystemStatus:
                 password=config['db_password']
             )
             
-            with conn.cursor() as cur:
-                cur.execute("SELECT version()")
-                version = cur.fetchone()[0]
+            with conn.cursor() as version_cur, conn.cursor() as count_cur:
+                with conn.pipeline():
+                    version_cur.execute("SELECT version()")
+                    if count is None:
+                        count_cur.execute("SELECT COUNT(*) FROM knowledge_items")
                 
-                cur.execute("SELECT COUNT(*) FROM knowledge_items")
-                count = cur.fetchone()[0]
+                version = version_cur.fetchone()[0]
+                if count is None:
+                    count = count_cur.fetchone()[0]
+                    if cache is not None:
+                        cache.store('total', generation, count)
             
             conn.close()
             
@@ -218,16 +596,43 @@ class PortableSystemStatus:
             }
     
     @staticmethod
-    def check_api(host: str, port: int) -> Dict[str, Any]:
-        """Check API server status"""
-        import urllib.request
-        import urllib.error
+    def check_api(host: str, port: int, include_response: bool = False) -> Dict[str, Any]:
+        """Check API server status
         
+        Probes /health with HEAD over a kept-alive connection; include_response
+        issues a GET and returns the decoded health document as well.
+        """
+        key = (host, port)
         try:
-            url = f"http://{host}:{port}/health"
-            with urllib.request.urlopen(url, timeout=5) as response:
-                data = json.loads(response.read().decode())
-                return {'status': 'healthy', 'response': data}
+            for attempt in range(2):
+                conn = _HTTP_CONNECTIONS.get(key)
+                if conn is None:
+                    conn = http.client.HTTPConnection(host, port, timeout=API_TIMEOUT)
+                    _HTTP_CONNECTIONS[key] = conn
+                try:
+                    conn.request('GET' if include_response else 'HEAD', '/health')
+                    response = conn.getresponse()
+                    body = response.read()
+                    # Servers that only route /health for GET reject HEAD with 405/501
+                    if response.status in (405, 501) and not include_response:
+                        conn.request('GET', '/health')
+                        response = conn.getresponse()
+                        body = response.read()
+                    break
+                except (http.client.HTTPException, ConnectionError):
+                    # Stale keep-alive connection: reconnect once
+                    conn.close()
+                    del _HTTP_CONNECTIONS[key]
+                    if attempt:
+                        raise
+            
+            if response.status >= 400:
+                return {'status': 'error', 'error': f"HTTP {response.status} {response.reason}"}
+            
+            result = {'status': 'healthy'}
+            if include_response:
+                result['response'] = json.loads(body)
+            return result
                 
         except Exception as e:
             return {'status': 'error', 'error': str(e)}
@@ -239,27 +644,29 @@ def main():
         print("Usage: python3 portable_knowledge_tools.py <command> [args]")
         print("")
         print("Commands:")
-        print("  count          - Get knowledge items count")
+        print("  count [--fast] - Get knowledge items count (--fast: estimate from statistics)")
         print("  search <query> - Search knowledge items")
         print("  add <title> <content> <type> - Add knowledge item")
-        print("  export <path>  - Export all knowledge to JSON")
+        print("  add --file <items.jsonl>      - Bulk add items (one JSON object per line)")
+        print("  add -                         - Bulk add NDJSON items read from stdin")
+        print("  export <path>  - Export all knowledge to JSON (NDJSON for .ndjson/.jsonl paths)")
         print("  status         - Check system status")
         print("")
         print("Environment Variables:")
         print("  DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD")
+        print("  DB_PREPARE_THRESHOLD - executions before a query is server-side prepared (default 1)")
         return
     
     command = sys.argv[1]
     
     if command == "count":
-        kb = PortableKnowledgeAccess()
-        result = kb.get_knowledge_count()
+        with PortableKnowledgeAccess(use_pool=False) as kb:
+            result = kb.get_knowledge_count(approximate="--fast" in sys.argv[2:])
         if result:
-            print(f"Total knowledge items: {result['total']}")
+            print(f"Total knowledge items: {'~' if result.get('approximate') else ''}{result['total']}")
             print("Distribution:")
             for ktype, count in result['by_type'].items():
                 print(f"  {ktype}: {count}")
-        kb.close()
         
     elif command == "search":
         if len(sys.argv) < 3:
@@ -267,30 +674,46 @@ def main():
             return
         
         query = sys.argv[2]
-        kb = PortableKnowledgeAccess()
-        results = kb.search_knowledge(query)
+        with PortableKnowledgeAccess(use_pool=False) as kb:
+            results = kb.search_knowledge(query, preview_chars=100)
         
         print(f"Found {len(results)} items for '{query}':")
         for item in results:
             print(f"  [{item['knowledge_type']}] {item['title']}")
-            print(f"    {item['content'][:100]}...")
+            print(f"    {item['content_preview']}...")
             print()
-        kb.close()
+        
+    elif command == "add" and (sys.argv[2:3] == ["-"] or (len(sys.argv) >= 4 and sys.argv[2] == "--file")):
+        # NDJSON from stdin ("add -") or a file, stored in a single transaction
+        try:
+            if sys.argv[2] == "-":
+                items = _read_ndjson_items(sys.stdin)
+            else:
+                with open(sys.argv[3], 'r') as f:
+                    items = _read_ndjson_items(f)
+        except ValueError as e:
+            print(f"Bulk add failed: {e}")
+            return
+        
+        with PortableKnowledgeAccess(use_pool=False) as kb:
+            stored = kb.add_knowledge_many(items)
+        print(f"Added {stored} of {len(items)} knowledge items")
         
     elif command == "add":
         if len(sys.argv) < 5:
             print("Usage: add <title> <content> <type>")
+            print("       add --file <items.jsonl>")
+            print("       add - < items.jsonl")
             return
         
         title, content, ktype = sys.argv[2], sys.argv[3], sys.argv[4]
-        kb = PortableKnowledgeAccess()
-        item_id = kb.add_knowledge(title, content, ktype)
+        with PortableKnowledgeAccess(use_pool=False) as kb:
+            item_id = kb.add_knowledge(title, content, ktype)
         
         if item_id:
             print(f"Added knowledge item: {item_id}")
         else:
             print("Failed to add knowledge item")
-        kb.close()
         
     elif command == "export":
         if len(sys.argv) < 3:
@@ -298,26 +721,31 @@ def main():
             return
         
         output_path = sys.argv[2]
-        kb = PortableKnowledgeAccess()
-        if kb.export_knowledge(output_path):
+        export_format = 'ndjson' if output_path.endswith(('.ndjson', '.jsonl')) else 'json'
+        with PortableKnowledgeAccess(use_pool=False) as kb:
+            exported = kb.export_knowledge(output_path, export_format)
+        if exported:
             print(f"Knowledge exported to: {output_path}")
         else:
             print("Export failed")
-        kb.close()
         
     elif command == "status":
-        config = {
-            'db_host': os.getenv('DB_HOST', 'localhost'),
-            'db_port': int(os.getenv('DB_PORT', '5432')),
-            'db_name': os.getenv('DB_NAME', 'knowledge_persistence'),
-            'db_user': os.getenv('DB_USER', 'postgres'),
-            'db_password': os.getenv('DB_PASSWORD', ''),
-        }
+        config = _env_config()
         
         print("=== System Status ===")
         
+        # Check database and API concurrently: wall time is the slower check, not the sum
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # One-shot: count directly rather than open a LISTEN connection for a single check
+            db_future = executor.submit(PortableSystemStatus.check_database, config, cached=False)
+            api_future = executor.submit(
+                PortableSystemStatus.check_api,
+                os.getenv('API_HOST', '192.168.10.90'),
+                int(os.getenv('API_PORT', '8090'))
+            )
+            db_status, api_status = db_future.result(), api_future.result()
+        
         # Database status
-        db_status = PortableSystemStatus.check_database(config)
         print(f"Database: {db_status['status']}")
         if db_status['status'] == 'healthy':
             print(f"  Knowledge items: {db_status['knowledge_items']}")
@@ -325,10 +753,6 @@ def main():
             print(f"  Error: {db_status['error']}")
         
         # API status
-        api_status = PortableSystemStatus.check_api(
-            os.getenv('API_HOST', '192.168.10.90'),
-            int(os.getenv('API_PORT', '8090'))
-        )
         print(f"API: {api_status['status']}")
         if api_status['status'] == 'error':
             print(f"  Error: {api_status['error']}")
@@ -337,4 +761,8 @@ def main():
         print(f"Unknown command: {command}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except psycopg.OperationalError as e:
+        print(f"Database connection failed: {e}")
+        sys.exit(1)
\ No newline at end of file